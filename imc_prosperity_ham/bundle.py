@@ -0,0 +1,97 @@
+import ast
+import os
+import sys
+from typing import List, Set, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Provided by the exchange next to the submission, so it stays an import
+PROVIDED = {'datamodel'}
+
+
+def sibling(module_name: str) -> bool:
+    return module_name not in PROVIDED and os.path.exists(os.path.join(HERE, f'{module_name}.py'))
+
+
+def module_source(module_name: str, included: Set[str], parts: List[str]) -> None:
+    """
+    Appends the source of the module to parts, after the sources of the sibling modules it imports.
+    The sibling imports and the __main__ block are left out, everything else is kept as written.
+    """
+    included.add(module_name)
+    path = os.path.join(HERE, f'{module_name}.py')
+    with open(path) as f:
+        source = f.read()
+
+    removed: Set[int] = set()
+    aliases: List[str] = []
+
+    for node in ast.parse(source, path).body:
+        if isinstance(node, ast.ImportFrom) and node.module and sibling(node.module):
+            if node.module not in included:
+                module_source(node.module, included, parts)
+            for name in node.names:
+                if name.name == '*':
+                    raise ValueError(f'{module_name}: "from {node.module} import *" cannot be bundled')
+                if name.asname and name.asname != name.name:
+                    aliases.append(f'{name.asname} = {name.name}')
+        elif isinstance(node, ast.Import) and any(sibling(name.name) for name in node.names):
+            raise ValueError(f'{module_name}: sibling modules must be imported with "from module import name" to be bundled')
+        elif not (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                  and isinstance(node.test.left, ast.Name) and node.test.left.id == '__name__'):
+            continue
+        removed.update(range(node.lineno - 1, node.end_lineno))
+
+    kept = [line for number, line in enumerate(source.splitlines()) if number not in removed]
+    parts.append(f'# ---- {module_name}.py\n' + '\n'.join(aliases + kept).strip('\n') + '\n')
+
+
+def definitions(source: str) -> List[Tuple[str, str]]:
+    """
+    (name, dump of the value) of everything defined at the top level of a module
+    """
+    found = []
+    for node in ast.parse(source).body:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            found.append((node.name, ast.dump(node)))
+        elif isinstance(node, ast.Assign):
+            found += [(target.id, ast.dump(node.value)) for target in node.targets if isinstance(target, ast.Name)]
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name) and node.value is not None:
+            found.append((node.target.id, ast.dump(node.value)))
+    return found
+
+
+def bundle(module_name: str) -> str:
+    """
+    One self-contained submission file for a trader: the trader module with every sibling module it imports
+    pasted in above it, in import order. Only datamodel is left as an import, the exchange provides it.
+
+    Raises ValueError if two of the modules define the same name differently, since they now share one namespace.
+    """
+    parts: List[str] = []
+    module_source(module_name, set(), parts)
+
+    seen = {}
+    for part in parts:
+        module = part.split('\n', 1)[0][len('# ---- '):]
+        # The same constant defined twice with the same value (e.g. PEARLS = 'PEARLS') is harmless
+        for name, value in definitions(part):
+            if name in seen and seen[name][1] != value:
+                raise ValueError(f'{name} is defined differently in {seen[name][0]} and {module}')
+            seen.setdefault(name, (module, value))
+
+    return f'# Generated by `python bundle.py {module_name}`, edit {module_name}.py and its modules instead.\n\n' + '\n\n'.join(parts)
+
+
+if __name__ == '__main__':
+    # python bundle.py sample_trader_round4 [output file, default submissions/sample_trader_round4.py]
+    module_name = sys.argv[1]
+    output = sys.argv[2] if len(sys.argv) > 2 else os.path.join(HERE, 'submissions', f'{module_name}.py')
+
+    source = bundle(module_name)
+    compile(source, output, 'exec')
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        f.write(source)
+    print(f'{output}: {len(source.splitlines())} lines')
@@ -0,0 +1,131 @@
+import glob
+import os
+import sys
+from typing import Dict, List, Tuple
+from datamodel import OrderDepth, Order, Symbol
+from fake_market import DATA_DIR, POSITION_LIMITS, read_prices
+
+
+def sweep(product: Symbol, order_depth: OrderDepth, quantity: int, limit_price: int) -> List[Order]:
+    """
+    Takes as much as possible of the quantity from every level of the book up to the limit price.
+
+    An order matches every level at or better than its price, each at the level's own price,
+    so the whole sweep fits in a single order priced at the deepest level reached.
+
+    Parameters:
+    product: Symbol
+        product to trade, i.e. "COCONUTS"
+    order_depth: OrderDepth
+        Order depth of the product
+    quantity: int
+        Positive number to buy, negative number to sell
+    limit_price: int
+        Worst price we are willing to trade at
+
+    Returns:
+    List[Order] with at most one order, empty if no level is within the limit
+    """
+    filled = 0
+    worst_price = None
+
+    if quantity > 0:
+        for ask in sorted(order_depth.sell_orders.keys()):
+            if ask > limit_price or filled == quantity:
+                break
+            filled += min(quantity - filled, -order_depth.sell_orders[ask])
+            worst_price = ask
+    elif quantity < 0:
+        for bid in sorted(order_depth.buy_orders.keys(), reverse=True):
+            if bid < limit_price or filled == quantity:
+                break
+            filled -= min(filled - quantity, order_depth.buy_orders[bid])
+            worst_price = bid
+
+    if worst_price is None or filled == 0:
+        return []
+
+    return [Order(product, worst_price, filled)]
+
+
+def top_of_book(product: Symbol, order_depth: OrderDepth, quantity: int) -> List[Order]:
+    """
+    Same order the traders' sell_highest_bid / buy_lowest_ask helpers send: the full quantity at the best price
+    """
+    if quantity > 0 and len(order_depth.sell_orders):
+        return [Order(product, min(order_depth.sell_orders.keys()), quantity)]
+    if quantity < 0 and len(order_depth.buy_orders):
+        return [Order(product, max(order_depth.buy_orders.keys()), quantity)]
+    return []
+
+
+def filled_quantity(orders: List[Order], order_depth: OrderDepth) -> int:
+    """
+    Quantity the orders would trade against the book, ignoring sign
+    """
+    buy_orders = dict(order_depth.buy_orders)
+    sell_orders = dict(order_depth.sell_orders)
+    filled = 0
+
+    for order in orders:
+        if order.quantity > 0:
+            remaining = order.quantity
+            for ask in sorted(sell_orders.keys()):
+                if ask > order.price or remaining == 0:
+                    break
+                volume = min(remaining, -sell_orders[ask])
+                sell_orders[ask] += volume
+                remaining -= volume
+                filled += volume
+        else:
+            remaining = -order.quantity
+            for bid in sorted(buy_orders.keys(), reverse=True):
+                if bid < order.price or remaining == 0:
+                    break
+                volume = min(remaining, buy_orders[bid])
+                buy_orders[bid] -= volume
+                remaining -= volume
+                filled += volume
+
+    return filled
+
+
+def fill_rate_benchmark(files: List[str], slippage: int = 3, size: float = 1/3) -> Dict[Symbol, Tuple[float, float]]:
+    """
+    Fill rate of top-of-book orders versus sweeps on recorded books. Every tick, each product
+    tries to buy and to sell `size` of its position limit, sweeping up to `slippage` ticks past the best price.
+
+    Returns:
+    Dict[Symbol, (top of book fill rate, sweep fill rate)]
+    """
+    wanted: Dict[Symbol, int] = {}
+    top_filled: Dict[Symbol, int] = {}
+    sweep_filled: Dict[Symbol, int] = {}
+
+    for file in files:
+        for books in read_prices(file).values():
+            for product, (order_depth, _) in books.items():
+                quantity = int(POSITION_LIMITS.get(product, 20) * size)
+
+                for side in (quantity, -quantity):
+                    if side > 0 and len(order_depth.sell_orders):
+                        limit_price = min(order_depth.sell_orders.keys()) + slippage
+                    elif side < 0 and len(order_depth.buy_orders):
+                        limit_price = max(order_depth.buy_orders.keys()) - slippage
+                    else:
+                        continue
+
+                    wanted[product] = wanted.get(product, 0) + quantity
+                    top_filled[product] = top_filled.get(product, 0) + filled_quantity(top_of_book(product, order_depth, side), order_depth)
+                    sweep_filled[product] = sweep_filled.get(product, 0) + filled_quantity(sweep(product, order_depth, side, limit_price), order_depth)
+
+    return {product: (top_filled[product] / total, sweep_filled[product] / total) for product, total in wanted.items() if total}
+
+
+if __name__ == '__main__':
+    # python execution.py [slippage]
+    slippage = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    files = sorted(glob.glob(os.path.join(DATA_DIR, '*', 'prices_*.csv')))
+
+    for product, (top, swept) in sorted(fill_rate_benchmark(files, slippage).items()):
+        print(f'{product:<15} top of book {top:6.1%}   sweep {swept:6.1%}')
@@ -1,7 +1,462 @@
+import csv
+import glob
+import importlib
+import io
+import os
+import random
+import re
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import redirect_stdout
+from typing import Dict, Iterable, List, Optional, Tuple
+from datamodel import Listing, OrderDepth, TradingState, Order, Trade, Symbol, Product, Position
+from result_store import ALL, ResultStore, RunWriter
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+# Repaired copies written by validate.py, with the folder and file names of DATA_DIR
+REPAIRED_DIR = os.path.join(DATA_DIR, 'repaired')
+
+# Position limits enforced by the exchange
+POSITION_LIMITS = {
+    'PEARLS': 20,
+    'BANANAS': 20,
+    'COCONUTS': 600,
+    'PINA_COLADAS': 300,
+    'DIVING_GEAR': 50,
+    'BERRIES': 250,
+    'BAGUETTE': 150,
+    'DIP': 300,
+    'UKULELE': 70,
+    'PICNIC_BASKET': 70,
+}
+
+
+# (round, day) of a recorded day
+Day = Tuple[int, int]
+
+
+def file_products(file) -> List[Product]:
+    """
+    Products of a prices csv, read from the rows of its first timestamp only
+    """
+    products = []
+    with open(file, newline='') as f:
+        reader = csv.reader(f, delimiter=';')
+        header = next(reader)
+        timestamp_column, product_column = header.index('timestamp'), header.index('product')
+        first = None
+        for row in reader:
+            if first is not None and row[timestamp_column] != first:
+                break
+            first = row[timestamp_column]
+            products.append(row[product_column])
+    return products
+
+
+def recorded_days(products: Optional[Iterable[Product]] = None, data_dir: str = DATA_DIR) -> List[Day]:
+    """
+    (round, day) of every distinct day with a prices file, in the order they were traded, which is the order of
+    the day numbers. Rounds re-release earlier days: round 2 days -1 and 0 hold the same PEARLS and BANANAS rows
+    as round 1 days -1 and 0, plus the new products. So each day number is listed once, with the file that has
+    the most products (the latest round on a tie).
+
+    With products, only the days whose file has all of them.
+    """
+    best: Dict[int, Tuple[int, int, List[Product]]] = {}
+    for file in glob.glob(os.path.join(data_dir, '*', 'prices_round_*_day_*.csv')):
+        round, day = (int(value) for value in re.search(r'prices_round_(\d+)_day_(-?\d+)\.csv$', file).groups())
+        day_products = file_products(file)
+        if day not in best or (len(day_products), round) > best[day][:2]:
+            best[day] = (len(day_products), round, day_products)
+
+    return [(round, day) for day, (_, round, day_products) in sorted(best.items())
+            if products is None or all(product in day_products for product in products)]
+
+
+def day_files(round: int, day: int, data_dir: str = DATA_DIR) -> Tuple[str, str]:
+    """
+    Returns the paths of the prices and trades csv files of a recorded day in data_dir.
+    Pass REPAIRED_DIR for the repaired copy, which only exists once `python validate.py` wrote it.
+    """
+    folder = os.path.join(data_dir, f'island-data-bottle-round-{round}')
+    prices = os.path.join(folder, f'prices_round_{round}_day_{day}.csv')
+    trades = os.path.join(folder, f'trades_round_{round}_day_{day}_nn.csv')
+    if data_dir == REPAIRED_DIR and not os.path.exists(prices):
+        raise FileNotFoundError(f'{prices} does not exist, run `python validate.py` to write the repaired copy')
+    return prices, trades
+
+
+def read_index(file) -> Tuple[array, array]:
+    """
+    Reads the index validate.py writes next to a repaired prices csv: (timestamps, byte offset of the first row of each)
+    """
+    words = array('q')
+    with open(os.path.splitext(file)[0] + '.idx', 'rb') as f:
+        words.frombytes(f.read())
+    return words[::2], words[1::2]
+
+
+def read_prices(file, start: int = None, end: int = None) -> Dict[int, Dict[Symbol, Tuple[OrderDepth, float]]]:
+    """
+    Reads a prices csv into timestamp -> product -> (order depth, mid price).
+    Sell order volumes are negative, like on the exchange.
+
+    With start and/or end only the timestamps in [start, end] are kept. Files with an index (the repaired copies)
+    are sorted by timestamp, so reading seeks straight to start and stops after end.
+    """
+    books: Dict[int, Dict[Symbol, Tuple[OrderDepth, float]]] = {}
+    indexed = (start is not None or end is not None) and os.path.exists(os.path.splitext(file)[0] + '.idx')
+
+    with open(file, newline='') as f:
+        fieldnames = f.readline().strip().split(';')
+        if indexed and start is not None:
+            timestamps, offsets = read_index(file)
+            position = bisect_left(timestamps, start)
+            if position == len(timestamps):
+                return books
+            f.seek(offsets[position])
+
+        for row in csv.DictReader(f, fieldnames=fieldnames, delimiter=';'):
+            timestamp = int(row['timestamp'])
+            if end is not None and timestamp > end:
+                if indexed:
+                    break
+                continue
+            if start is not None and timestamp < start:
+                continue
+
+            order_depth = OrderDepth()
+            for level in (1, 2, 3):
+                bid_price = row[f'bid_price_{level}']
+                if bid_price:
+                    order_depth.buy_orders[int(bid_price)] = int(row[f'bid_volume_{level}'])
+                ask_price = row[f'ask_price_{level}']
+                if ask_price:
+                    order_depth.sell_orders[int(ask_price)] = -int(row[f'ask_volume_{level}'])
+
+            books.setdefault(timestamp, {})[row['product']] = (order_depth, float(row['mid_price']))
+
+    return books
+
+
+def read_trades(file) -> Dict[int, Dict[Symbol, List[Trade]]]:
+    """
+    Reads a trades csv into timestamp -> product -> market trades
+    """
+    trades: Dict[int, Dict[Symbol, List[Trade]]] = {}
+
+    if file is None or not os.path.exists(file):
+        return trades
+
+    with open(file, newline='') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            trade = Trade(row['symbol'], int(float(row['price'])), int(row['quantity']), row['buyer'], row['seller'])
+            trades.setdefault(int(row['timestamp']), {}).setdefault(row['symbol'], []).append(trade)
+
+    return trades
+
+
+def copy_order_depth(order_depth: OrderDepth) -> OrderDepth:
+    copy = OrderDepth()
+    copy.buy_orders = dict(order_depth.buy_orders)
+    copy.sell_orders = dict(order_depth.sell_orders)
+    return copy
+
+
 class FakeMarket:
-    def empty_data_test(trader: Trader):
-        pass
+    """
+    Local replay of a recorded day. Every tick the trader gets a TradingState built from the
+    prices and trades csv files, and its orders are matched against the recorded order book.
+
+    With passive_fills, whatever is left of an order after crossing the book rests until the next tick,
+    and fills against the recorded market trades of that tick that happened at its price or better.
+    Otherwise orders that do not cross the book are cancelled at the end of the tick.
+
+    If a RunWriter is given, the fills, positions, PnL, latency and log output of every tick are written to it.
+
+    The replay is deterministic unless perturbed, for Monte Carlo runs (see monte_carlo.py):
+    fill_probability: chance that a market trade which would fill a resting order actually does
+    slippage: every fill against the book is moved against us by a random 0 to `slippage` ticks
+    drop_probability: chance that the orders of a tick never reach the exchange
+    seed: seed of the random generator behind all three
+    """
+    def __init__(self, trader, limits: Dict[Symbol, int] = POSITION_LIMITS, passive_fills: bool = True, run: RunWriter = None,
+                 fill_probability: float = 1.0, slippage: int = 0, drop_probability: float = 0.0, seed=None) -> None:
+        self.trader = trader
+        self.limits = limits
+        self.passive_fills = passive_fills
+        self.run = run
+        self.fill_probability = fill_probability
+        self.slippage = slippage
+        self.drop_probability = drop_probability
+        self.random = random.Random(seed)
+        self.dropped = 0
+
+        self.position: Dict[Product, Position] = {}
+        self.cash: Dict[Product, float] = {}
+        self.mids: Dict[Product, float] = {}
+        self.own_trades: Dict[Symbol, List[Trade]] = {}
+        # Remainders of last tick's orders, as (order, remaining quantity), and the timestamp they were sent at
+        self.resting: List[Tuple[Order, int]] = []
+        self.resting_timestamp = 0
+        self.rejected: Dict[Symbol, int] = {}
+        self.latencies: List[float] = []
+        # Total PnL after every tick
+        self.pnl_history: List[float] = []
+
+    def empty_data_test(self) -> Dict[str, List[Order]]:
+        """
+        Runs the trader once on a state without any products
+        """
+        state = TradingState(0, {}, {}, {}, {}, {}, {})
+        return self.trader.run(state)
+
+    def file_data_test(self, file, trades_file=None) -> Dict[Product, float]:
+        """
+        Replays a whole prices csv (and optionally its trades csv) and returns the PnL per product
+        """
+        return self.replay(read_prices(file), read_trades(trades_file))
+
+    def replay(self, books: Dict[int, Dict[Symbol, Tuple[OrderDepth, float]]], trades: Dict[int, Dict[Symbol, List[Trade]]]) -> Dict[Product, float]:
+        """
+        Replays a day already read with read_prices and read_trades, and returns the PnL per product
+        """
+        try:
+            for timestamp in sorted(books):
+                self.step(timestamp, books[timestamp], trades.get(timestamp, {}))
+        finally:
+            # Also after a crash, so the store has the run up to the tick that failed
+            if self.run is not None:
+                self.run.flush()
+
+        return self.pnl()
+
+    def step(self, timestamp: int, books: Dict[Symbol, Tuple[OrderDepth, float]], market_trades: Dict[Symbol, List[Trade]]) -> None:
+        """
+        Runs one tick: fills the resting orders, builds the state, calls the trader and fills its orders
+        """
+        state = self.make_state(timestamp, books, market_trades)
+
+        # The traders print a log line every tick, which we do not want in the replay output
+        output = io.StringIO()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            result = self.trader.run(state)
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+
+        if self.drop_probability and self.random.random() < self.drop_probability:
+            result = {}
+            self.dropped += 1
+
+        self.settle(timestamp, result, books, latency, output.getvalue())
+
+    def make_state(self, timestamp: int, books: Dict[Symbol, Tuple[OrderDepth, float]], market_trades: Dict[Symbol, List[Trade]]) -> TradingState:
+        """
+        First half of a tick: fills the resting orders and builds the state sent to the trader
+        """
+        self.fill_resting(market_trades)
+
+        listings = {product: Listing(product, product, 'SEASHELLS') for product in books}
+        order_depths = {product: copy_order_depth(order_depth) for product, (order_depth, _) in books.items()}
+        for product, (_, mid) in books.items():
+            self.mids[product] = mid
+
+        state = TradingState(timestamp, listings, order_depths, self.own_trades, market_trades, dict(self.position), {})
+        # Every fill is reported in exactly one state, also when several ticks are settled between two states
+        self.own_trades = {}
+        return state
+
+    def settle(self, timestamp: int, result: Dict[str, List[Order]], books: Dict[Symbol, Tuple[OrderDepth, float]], latency: float = 0.0, logs: str = '') -> None:
+        """
+        Second half of a tick: fills the trader's orders and records the tick in the result store
+        """
+        self.match_orders(timestamp, [order for orders in result.values() for order in orders], books)
+
+        pnl = self.pnl()
+        self.pnl_history.append(sum(pnl.values()))
+
+        if self.run is not None:
+            self.run.append('latency', ALL, timestamp, latency)
+            self.run.log(timestamp, logs)
+            for product, product_pnl in pnl.items():
+                self.run.append('position', product, timestamp, self.position.get(product, 0))
+                self.run.append('pnl', product, timestamp, product_pnl)
+
+    def match_orders(self, timestamp: int, orders: List[Order], books: Dict[Symbol, Tuple[OrderDepth, float]]) -> None:
+        """
+        Fills the orders of every product against the recorded book. Like on the exchange, all orders
+        of a product are rejected if they could breach its position limit or if a quantity is not an integer.
+        """
+        by_symbol: Dict[Symbol, List[Order]] = {}
+        for order in orders:
+            by_symbol.setdefault(order.symbol, []).append(order)
+
+        for symbol, symbol_orders in by_symbol.items():
+            if symbol not in books or not self.accept(symbol, symbol_orders):
+                self.rejected[symbol] = self.rejected.get(symbol, 0) + len(symbol_orders)
+                continue
+
+            # Fill against a copy, so that two of our orders cannot take the same volume
+            order_depth = copy_order_depth(books[symbol][0])
+            self.resting_timestamp = timestamp
+            for order in symbol_orders:
+                remaining = self.fill(timestamp, order, order_depth)
+                if self.passive_fills and remaining != 0:
+                    self.resting.append((order, remaining))
+
+    def accept(self, symbol: Symbol, orders: List[Order]) -> bool:
+        if any(int(order.quantity) != order.quantity for order in orders):
+            return False
+
+        limit = self.limits.get(symbol)
+        if limit is None:
+            return True
+
+        current = self.position.get(symbol, 0)
+        total_buy = sum(order.quantity for order in orders if order.quantity > 0)
+        total_sell = sum(order.quantity for order in orders if order.quantity < 0)
+        return current + total_buy <= limit and current + total_sell >= -limit
+
+    def fill(self, timestamp: int, order: Order, order_depth: OrderDepth) -> int:
+        """
+        Crosses the order with the book and returns the quantity left unfilled
+        """
+        remaining = int(order.quantity)
+
+        if remaining > 0:
+            for ask in sorted(order_depth.sell_orders.keys()):
+                if ask > order.price or remaining == 0:
+                    break
+                volume = min(remaining, -order_depth.sell_orders[ask])
+                order_depth.sell_orders[ask] += volume
+                remaining -= volume
+                self.record_trade(timestamp, order.symbol, ask + self.slip(), volume)
+        elif remaining < 0:
+            for bid in sorted(order_depth.buy_orders.keys(), reverse=True):
+                if bid < order.price or remaining == 0:
+                    break
+                volume = min(-remaining, order_depth.buy_orders[bid])
+                order_depth.buy_orders[bid] -= volume
+                remaining += volume
+                self.record_trade(timestamp, order.symbol, bid - self.slip(), -volume)
+
+        return remaining
+
+    def slip(self) -> int:
+        return self.random.randint(0, self.slippage) if self.slippage else 0
+
+    def fill_resting(self, market_trades: Dict[Symbol, List[Trade]]) -> None:
+        """
+        Fills last tick's resting orders against the market trades since then. A market trade at a price
+        at or below our bid (or at or above our ask) would have hit us first, at our price.
+
+        The fills show up in the state of this tick, but are stamped with the tick that sent the orders,
+        like the exchange stamps every fill.
+        """
+        resting, self.resting = self.resting, []
+        # Volume of every market trade not used up by our fills yet
+        available: Dict[int, int] = {}
+
+        for order, remaining in resting:
+            for trade in market_trades.get(order.symbol, []):
+                if remaining == 0:
+                    break
+
+                left = available.get(id(trade), trade.quantity)
+                if left == 0:
+                    continue
+
+                if remaining > 0 and trade.price <= order.price:
+                    volume = min(remaining, left)
+                elif remaining < 0 and trade.price >= order.price:
+                    volume = -min(-remaining, left)
+                else:
+                    continue
+
+                if self.fill_probability < 1 and self.random.random() >= self.fill_probability:
+                    continue
+
+                available[id(trade)] = left - abs(volume)
+                remaining -= volume
+                self.record_trade(self.resting_timestamp, order.symbol, order.price, volume)
+
+    def record_trade(self, timestamp: int, symbol: Symbol, price: int, quantity: int) -> None:
+        """
+        Books a fill of our own. Positive quantity means we bought.
+        """
+        if quantity == 0:
+            return
+
+        self.position[symbol] = self.position.get(symbol, 0) + quantity
+        self.cash[symbol] = self.cash.get(symbol, 0) - price * quantity
+
+        if quantity > 0:
+            trade = Trade(symbol, price, quantity, 'SUBMISSION', '')
+        else:
+            trade = Trade(symbol, price, -quantity, '', 'SUBMISSION')
+        self.own_trades.setdefault(symbol, []).append(trade)
+
+        if self.run is not None:
+            self.run.append('fills', symbol, timestamp, price, quantity)
+
+    def pnl(self) -> Dict[Product, float]:
+        """
+        Cash plus the position marked at the last mid price, per product
+        """
+        return {product: cash + self.position.get(product, 0) * self.mids.get(product, 0) for product, cash in self.cash.items()}
+
+    def report(self) -> str:
+        lines = []
+
+        for product, pnl in sorted(self.pnl().items()):
+            lines.append(f'{product:<15} pnl {pnl:>12.1f}  position {self.position.get(product, 0):>5}')
+        for symbol, count in sorted(self.rejected.items()):
+            lines.append(f'{symbol:<15} rejected {count} orders')
+        if self.dropped:
+            lines.append(f'dropped the orders of {self.dropped} ticks')
+
+        if self.latencies:
+            mean = sum(self.latencies) / len(self.latencies)
+            lines.append(f'run: {len(self.latencies)} ticks, mean {mean * 1e6:.0f}us, max {max(self.latencies) * 1e6:.0f}us')
+
+        # Traders that size their orders report how much they had to clip
+        sizer = getattr(self.trader, 'sizer', None)
+        if sizer is not None:
+            for symbol in sorted(set(sizer.clipped) | set(sizer.dropped) | set(sizer.rounded)):
+                lines.append(f'{symbol:<15} clipped {sizer.clipped.get(symbol, 0)} units, dropped {sizer.dropped.get(symbol, 0)} orders, rounded {sizer.rounded.get(symbol, 0)} orders')
+
+        # Traders with a risk engine report its view of the day and what it blocked
+        risk = getattr(self.trader, 'risk', None)
+        if risk is not None:
+            lines.extend(risk.report())
+
+        # Traders that skip unchanged order books report how much work they saved
+        cache = getattr(self.trader, 'cache', None)
+        if cache is not None:
+            for symbol, fraction in sorted(cache.skipped_fraction().items()):
+                lines.append(f'{symbol:<15} skipped {fraction:.1%} of ticks (order book unchanged)')
+
+        return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # python fake_market.py sample_trader_round4 2 1 [repaired] [store directory]   "repaired" replays the copy validate.py wrote
+    trader_module, round, day = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    options = sys.argv[4:]
+    repaired = bool(options) and options[0] == 'repaired'
+    if repaired:
+        options = options[1:]
+
+    run = None
+    if options:
+        run = ResultStore(options[0]).open_run(f'{trader_module}_round_{round}_day_{day}{"_repaired" if repaired else ""}_{time.strftime("%Y%m%d_%H%M%S")}')
+
+    market = FakeMarket(importlib.import_module(trader_module).Trader(), run=run)
+    market.file_data_test(*day_files(round, day, REPAIRED_DIR if repaired else DATA_DIR))
+    print(market.report())
 
-    def file_data_test(trader: Trader, file):
-        pass
-    
+    if run is not None:
+        run.close()
@@ -0,0 +1,137 @@
+from typing import TYPE_CHECKING, Dict
+from datamodel import OrderDepth, Symbol
+
+if TYPE_CHECKING:
+    # Only for the annotations, book_features imports NumPy when called so that the traders do not need it
+    import numpy as np
+
+NAN = float('nan')
+
+
+class BookFeatures:
+    """
+    Order book features of one product, updated from each new OrderDepth snapshot.
+
+    microprice: mid price weighted towards the side with less volume at the top of the book
+    imbalance: (bid volume - ask volume) / (bid volume + ask volume) over all levels, in [-1, 1]
+    ofi: order flow imbalance between the previous and the current snapshot (Cont, Kukanov & Stoikov),
+         positive when buying pressure was added at the top of the book
+
+    Each update is O(levels) and keeps only scalars, so nothing is allocated once running.
+    Features that need both sides of the book are NaN while one side is empty.
+    """
+    def __init__(self) -> None:
+        self.microprice = NAN
+        self.imbalance = NAN
+        self.ofi = 0.0
+
+        self.best_bid = None
+        self.best_bid_volume = 0
+        self.best_ask = None
+        self.best_ask_volume = 0
+
+    def update(self, order_depth: OrderDepth) -> None:
+        buy_orders = order_depth.buy_orders
+        sell_orders = order_depth.sell_orders
+
+        best_bid = None
+        bid_volume = 0
+        for price, volume in buy_orders.items():
+            bid_volume += volume
+            if best_bid is None or price > best_bid:
+                best_bid = price
+
+        best_ask = None
+        ask_volume = 0
+        for price, volume in sell_orders.items():
+            ask_volume -= volume  # sell volumes are negative
+            if best_ask is None or price < best_ask:
+                best_ask = price
+
+        best_bid_volume = buy_orders[best_bid] if best_bid is not None else 0
+        best_ask_volume = -sell_orders[best_ask] if best_ask is not None else 0
+
+        if best_bid is not None and best_ask is not None and best_bid_volume + best_ask_volume > 0:
+            self.microprice = (best_bid * best_ask_volume + best_ask * best_bid_volume) / (best_bid_volume + best_ask_volume)
+        else:
+            self.microprice = NAN
+
+        if bid_volume + ask_volume > 0 and best_bid is not None and best_ask is not None:
+            self.imbalance = (bid_volume - ask_volume) / (bid_volume + ask_volume)
+        else:
+            self.imbalance = NAN
+
+        ofi = 0.0
+        if best_bid is not None and self.best_bid is not None:
+            if best_bid >= self.best_bid:
+                ofi += best_bid_volume
+            if best_bid <= self.best_bid:
+                ofi -= self.best_bid_volume
+        if best_ask is not None and self.best_ask is not None:
+            if best_ask <= self.best_ask:
+                ofi -= best_ask_volume
+            if best_ask >= self.best_ask:
+                ofi += self.best_ask_volume
+        self.ofi = ofi
+
+        self.best_bid = best_bid
+        self.best_bid_volume = best_bid_volume
+        self.best_ask = best_ask
+        self.best_ask_volume = best_ask_volume
+
+
+def book_features(file) -> Dict[Symbol, Dict[str, "np.ndarray"]]:
+    """
+    Offline version of BookFeatures for research: computes the same features for every tick
+    of a prices csv at once.
+
+    Returns:
+    Dict[Symbol, Dict[str, np.ndarray]] mapping each product to its timestamps, microprice, imbalance and ofi
+    """
+    # Only needed for research, the traders do not import them
+    import numpy as np
+    import pandas
+
+    prices = pandas.read_csv(file, delimiter=';')
+    features = {}
+
+    for product, rows in prices.groupby('product', sort=True):
+        rows = rows.sort_values('timestamp')
+
+        bid = rows['bid_price_1'].to_numpy(dtype=float)
+        ask = rows['ask_price_1'].to_numpy(dtype=float)
+        bid_volume = np.nan_to_num(rows['bid_volume_1'].to_numpy(dtype=float))
+        ask_volume = np.nan_to_num(rows['ask_volume_1'].to_numpy(dtype=float))
+
+        total_bid_volume = np.nan_to_num(rows[['bid_volume_1', 'bid_volume_2', 'bid_volume_3']].to_numpy(dtype=float)).sum(axis=1)
+        total_ask_volume = np.nan_to_num(rows[['ask_volume_1', 'ask_volume_2', 'ask_volume_3']].to_numpy(dtype=float)).sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            microprice = (bid * ask_volume + ask * bid_volume) / (bid_volume + ask_volume)
+            imbalance = (total_bid_volume - total_ask_volume) / (total_bid_volume + total_ask_volume)
+        two_sided = ~np.isnan(bid) & ~np.isnan(ask)
+        microprice[~two_sided] = np.nan
+        imbalance[~two_sided] = np.nan
+
+        # Compare every snapshot with the previous one, comparisons with NaN are False so missing sides add nothing
+        previous_bid, previous_ask = bid[:-1], ask[:-1]
+        previous_bid_volume, previous_ask_volume = bid_volume[:-1], ask_volume[:-1]
+        current_bid, current_ask = bid[1:], ask[1:]
+        current_bid_volume, current_ask_volume = bid_volume[1:], ask_volume[1:]
+
+        ofi = np.zeros(len(rows))
+        ofi[1:] = (
+            np.where(current_bid >= previous_bid, current_bid_volume, 0)
+            - np.where(current_bid <= previous_bid, previous_bid_volume, 0)
+            - np.where(current_ask <= previous_ask, current_ask_volume, 0)
+            + np.where(current_ask >= previous_ask, previous_ask_volume, 0)
+        )
+
+        features[product] = {
+            'timestamp': rows['timestamp'].to_numpy(),
+            'microprice': microprice,
+            'imbalance': imbalance,
+            'ofi': ofi,
+        }
+
+    return features
@@ -0,0 +1,93 @@
+from typing import Dict, List, Optional, Tuple
+from datamodel import OrderDepth, Order, Symbol, Product, Position
+
+
+def book_fingerprint(order_depth: OrderDepth) -> Tuple:
+    """
+    Cheap fingerprint of an order book: the (price, volume) pairs of every level on both sides.
+    Two books with the same fingerprint hold exactly the same levels.
+    """
+    return (tuple(order_depth.buy_orders.items()), tuple(order_depth.sell_orders.items()))
+
+
+def within_limits(orders: Dict[Symbol, List[Order]], position: Dict[Product, Position], limits: Dict[Symbol, int]) -> bool:
+    """
+    Returns True if the orders can be sent without breaching the position limits,
+    assuming every buy and every sell order gets filled.
+
+    Orders are added up per order.symbol across all keys, like OrderSizer.clip does, since a strategy
+    may send orders for another symbol than its key (e.g. DIVING_GEAR orders under PICNIC_BASKET).
+    """
+    total_buy: Dict[Symbol, int] = {}
+    total_sell: Dict[Symbol, int] = {}
+    for symbol_orders in orders.values():
+        for order in symbol_orders:
+            if order.quantity > 0:
+                total_buy[order.symbol] = total_buy.get(order.symbol, 0) + order.quantity
+            else:
+                total_sell[order.symbol] = total_sell.get(order.symbol, 0) - order.quantity
+
+    for symbol in total_buy.keys() | total_sell.keys():
+        limit = limits.get(symbol)
+        if limit is None:
+            continue
+
+        current = position.get(symbol, 0)
+        if current + total_buy.get(symbol, 0) > limit or current - total_sell.get(symbol, 0) < -limit:
+            return False
+
+    return True
+
+
+class IncrementalCache:
+    """
+    Remembers the last orders produced by each strategy together with a fingerprint of its inputs,
+    so that a strategy whose order books have not changed since the last tick does not need to rerun.
+
+    Only use this for strategies that are a pure function of their inputs. Strategies that update
+    their own state every tick (e.g. the BANANAS SMA) must always run.
+    """
+    def __init__(self) -> None:
+        self.entries: Dict[Tuple[Symbol, ...], Tuple[Tuple, Dict[Symbol, List[Order]]]] = {}
+        self.calls: Dict[Symbol, int] = {}
+        self.skips: Dict[Symbol, int] = {}
+
+    def lookup(self, symbols: Tuple[Symbol, ...], fingerprint: Tuple, position: Dict[Product, Position], limits: Dict[Symbol, int]) -> Optional[Dict[Symbol, List[Order]]]:
+        """
+        Parameters:
+        symbols: Tuple[Symbol, ...]
+            Products the strategy trades, used as the cache key
+        fingerprint: Tuple
+            Fingerprint of everything the strategy reads this tick
+        position: Dict[Product, Position]
+            Current position, used to re-check the cached orders against the limits
+        limits: Dict[Symbol, int]
+            Position limit for each product
+
+        Returns:
+        The cached orders if the inputs are unchanged and they still fit in the limits, otherwise None
+        """
+        for symbol in symbols:
+            self.calls[symbol] = self.calls.get(symbol, 0) + 1
+
+        entry = self.entries.get(symbols)
+        if entry is None or entry[0] != fingerprint:
+            return None
+
+        orders = entry[1]
+        if not within_limits(orders, position, limits):
+            return None
+
+        for symbol in symbols:
+            self.skips[symbol] = self.skips.get(symbol, 0) + 1
+
+        return {symbol: list(symbol_orders) for symbol, symbol_orders in orders.items()}
+
+    def store(self, symbols: Tuple[Symbol, ...], fingerprint: Tuple, orders: Dict[Symbol, List[Order]]) -> None:
+        self.entries[symbols] = (fingerprint, orders)
+
+    def skipped_fraction(self) -> Dict[Symbol, float]:
+        """
+        Fraction of calls per product that reused the previous orders instead of recomputing them
+        """
+        return {symbol: self.skips.get(symbol, 0) / calls for symbol, calls in self.calls.items() if calls}
@@ -0,0 +1,35 @@
+import base64
+import importlib.util
+import json
+import sys
+import zlib
+
+
+def lazy_import(name: str):
+    """
+    Returns the module without running it yet: it is only executed the first time one of its attributes is used.
+    Lets a trader mention a heavy dependency such as numpy at the top of the file without paying for it at startup.
+
+    Only defer modules that are not needed on every tick, otherwise the cost just moves into the first run().
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def pack_tables(tables: dict) -> str:
+    """
+    Packs precomputed tables into a compact ascii blob that can be pasted into a trader file
+    """
+    return base64.b85encode(zlib.compress(json.dumps(tables, separators=(',', ':'), sort_keys=True).encode(), 9)).decode()
+
+
+def unpack_tables(blob: str) -> dict:
+    return json.loads(zlib.decompress(base64.b85decode(blob)))
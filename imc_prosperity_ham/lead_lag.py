@@ -0,0 +1,114 @@
+import multiprocessing
+import os
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from fake_market import Day, recorded_days
+from research import load_day
+
+
+def returns(mids: np.ndarray) -> np.ndarray:
+    """
+    Tick to tick log returns of every column, scaled to zero mean and unit variance so that
+    their cross products are correlations
+    """
+    changes = np.diff(np.log(mids), axis=0)
+    changes -= changes.mean(axis=0)
+    std = changes.std(axis=0)
+    std[std == 0] = 1
+    return changes / std
+
+
+def cross_correlations(values: np.ndarray, max_lag: int) -> np.ndarray:
+    """
+    Lagged correlations of every pair of columns at once, with one FFT per column instead of
+    one pass per pair and lag.
+
+    Returns:
+    (max_lag + 1, columns, columns) array where [k, i, j] is the correlation of column i with column j
+    k ticks earlier, i.e. large values mean j leads i by k ticks
+    """
+    ticks = len(values)
+    # Zero padding to twice the length turns the circular correlation of the FFT into a linear one
+    spectrum = np.fft.rfft(values, n=2 * ticks, axis=0)
+    products = spectrum[:, :, None] * np.conj(spectrum[:, None, :])
+    correlations = np.fft.irfft(products, n=2 * ticks, axis=0)[:max_lag + 1]
+    # Each lag only has ticks - k overlapping pairs
+    return correlations / (ticks - np.arange(max_lag + 1))[:, None, None]
+
+
+def scan_day(job: Tuple[Day, int]) -> Tuple[Day, List[str], int, np.ndarray]:
+    day, max_lag = job
+    prices = load_day(*day)
+    values = returns(prices.mids)
+    return day, prices.symbols, len(values), cross_correlations(values, max_lag)
+
+
+def lead_lag(days: Optional[List[Day]] = None, max_lag: int = 50, processes: Optional[int] = None) -> List[Dict]:
+    """
+    Scans every ordered pair of products over every day, one day per process, and keeps the lag
+    with the strongest correlation for each pair.
+
+    Returns:
+    One dict per (leader, follower) pair: the best lag in ticks (at least 1), the correlation there averaged over
+    the days weighted by their ticks, a z score of it, the number of days where the correlation had the same sign,
+    and the same-tick correlation for reference. Strongest z score first.
+    The best of max_lag lags is picked, so z scores of 2 to 3 are expected even without any relation.
+
+    A day number given under several rounds (round 2 re-releases round 1's days) is scanned once, with the
+    latest round, so that it is neither counted twice in consistent_days nor weighted twice in the z score.
+    """
+    if days:
+        days = sorted({day: (round, day) for round, day in sorted(days)}.values(), key=lambda day: day[1])
+    jobs = [(day, max_lag) for day in days or recorded_days()]
+    with multiprocessing.get_context('fork').Pool(processes or min(len(jobs), os.cpu_count() or 1)) as pool:
+        scanned = pool.map(scan_day, jobs)
+
+    # (leader, follower) -> [sum of correlation * ticks per lag, ticks, [correlation per lag of every day]]
+    totals: Dict[Tuple[str, str], list] = {}
+    for day, symbols, ticks, correlations in scanned:
+        for follower_index, follower in enumerate(symbols):
+            for leader_index, leader in enumerate(symbols):
+                if leader == follower:
+                    continue
+                pair = correlations[:, follower_index, leader_index]
+                total = totals.setdefault((leader, follower), [np.zeros(max_lag + 1), 0, []])
+                total[0] += pair * ticks
+                total[1] += ticks
+                total[2].append(pair)
+
+    results = []
+    for (leader, follower), (weighted, ticks, per_day) in totals.items():
+        correlations = weighted / ticks
+        lag = 1 + int(np.argmax(np.abs(correlations[1:])))
+        correlation = correlations[lag]
+        results.append({
+            'leader': leader,
+            'follower': follower,
+            'lag': lag,
+            'correlation': float(correlation),
+            # Correlations of independent series are about normal with standard deviation 1 / sqrt(ticks)
+            'z': float(correlation * np.sqrt(ticks - lag)),
+            'consistent_days': int(sum(np.sign(day[lag]) == np.sign(correlation) for day in per_day)),
+            'days': len(per_day),
+            'same_tick': float(correlations[0]),
+        })
+
+    return sorted(results, key=lambda result: -abs(result['z']))
+
+
+if __name__ == '__main__':
+    # python lead_lag.py [max lag in ticks] [top rows]
+    max_lag = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    start = time.perf_counter()
+    results = lead_lag(max_lag=max_lag)
+    elapsed = time.perf_counter() - start
+
+    print(f'{"leader":<16} {"follower":<16} {"lag":>4} {"corr":>7} {"z":>7} {"days":>5} {"lag 0":>7}')
+    for result in results[:top]:
+        print(f'{result["leader"]:<16} {result["follower"]:<16} {result["lag"]:>4} {result["correlation"]:>7.3f} {result["z"]:>7.1f} '
+              f'{result["consistent_days"]:>2}/{result["days"]:<2} {result["same_tick"]:>7.3f}')
+    print(f'{len(results)} pairs x {max_lag} lags in {elapsed:.2f}s')
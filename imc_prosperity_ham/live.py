@@ -0,0 +1,217 @@
+import asyncio
+import importlib
+import io
+import json
+import sys
+import time
+from contextlib import redirect_stdout
+from typing import Dict, List
+from datamodel import ProsperityEncoder
+from fake_market import FakeMarket, day_files, read_prices, read_trades
+from log_parser import parse_orders, parse_state
+
+# Messages are one JSON object per line:
+#   exchange -> trader: {"state": {...}}  ...  {"end": true}
+#   trader -> exchange: {"timestamp": ..., "orders": {...}}
+
+
+class LocalExchange:
+    """
+    Stand-in for the exchange: streams the TradingStates of a recorded day to a connected trader and settles
+    the orders it sends back with a FakeMarket.
+
+    speed is in ticks per second, 0 streams as fast as the trader keeps up. In lockstep mode the next state is only
+    sent once the orders for the previous one arrived (or tick_timeout passed), like on the real exchange.
+    Otherwise up to max_in_flight states are sent ahead; when the queue is full the stream waits, and orders
+    that arrive after their tick was settled are counted as late.
+
+    Pipelined mode is a load test, not a backtest. Before a state is built, the earlier ticks whose orders already
+    arrived are settled, but the ones still in flight are not, so the trader can see a stale position and fills
+    and send orders that breach the limits. Its PnL is reported separately and is not comparable with lockstep or replay runs.
+    """
+    def __init__(self, prices_file, trades_file=None, speed: float = 0, lockstep: bool = True, max_in_flight: int = 16, tick_timeout: float = 1.0) -> None:
+        self.books = read_prices(prices_file)
+        self.trades = read_trades(trades_file)
+        timestamps = sorted(self.books)
+        # Timestamp of the tick after each tick
+        self.following = dict(zip(timestamps, timestamps[1:]))
+        self.speed = speed
+        self.lockstep = lockstep
+        self.max_in_flight = max_in_flight
+        self.tick_timeout = tick_timeout
+
+        self.market = FakeMarket(None)
+        self.latencies: List[float] = []
+        self.missed = 0
+        self.late = 0
+        # States built while earlier ticks were still unsettled (pipelined mode only)
+        self.stale = 0
+        self.done = asyncio.Event()
+
+    async def serve(self, host: str = '127.0.0.1', port: int = 0) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle, host, port)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Bounded queue between the tick producer and the socket, full means the trader is behind
+        outgoing: asyncio.Queue = asyncio.Queue(maxsize=self.max_in_flight)
+        # Ticks sent but not settled yet: timestamp -> (time sent, future for the orders)
+        pending: Dict[int, tuple] = {}
+
+        async def send() -> None:
+            while True:
+                line = await outgoing.get()
+                writer.write(line)
+                await writer.drain()
+                if line is END:
+                    return
+
+        async def receive() -> None:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                message = json.loads(line)
+                entry = pending.get(message['timestamp'])
+                if entry is None:
+                    self.late += 1
+                    continue
+                sent, future = entry
+                self.latencies.append(time.perf_counter() - sent)
+                if not future.done():
+                    future.set_result(parse_orders(message['orders']))
+
+        sender = asyncio.create_task(send())
+        receiver = asyncio.create_task(receive())
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+
+        for tick, timestamp in enumerate(sorted(self.books)):
+            if self.speed:
+                delay = start + tick / self.speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            if not self.lockstep:
+                # Settle the earlier ticks whose orders are already in, oldest first, so the state is as fresh as the trader allows
+                while pending and pending[min(pending)][1].done():
+                    oldest = min(pending)
+                    await self.settle(oldest, self.books[oldest], pending)
+                if pending:
+                    self.stale += 1
+
+            books = self.books[timestamp]
+            state = self.market.make_state(timestamp, books, self.trades.get(timestamp, {}))
+            future = loop.create_future()
+            pending[timestamp] = (time.perf_counter(), future)
+            await outgoing.put(('{"state":' + state.toJSON() + '}\n').encode())
+
+            if self.lockstep:
+                await self.settle(timestamp, books, pending)
+            else:
+                # Settle the oldest ticks once too many are in flight
+                while len(pending) >= self.max_in_flight:
+                    oldest = min(pending)
+                    await self.settle(oldest, self.books[oldest], pending)
+
+        for timestamp in sorted(pending):
+            await self.settle(timestamp, self.books[timestamp], pending)
+
+        await outgoing.put(END)
+        await sender
+        writer.close()
+        receiver.cancel()
+        self.done.set()
+
+    async def settle(self, timestamp: int, books, pending: Dict[int, tuple]) -> None:
+        _, future = pending[timestamp]
+        try:
+            orders = await asyncio.wait_for(future, self.tick_timeout)
+        except asyncio.TimeoutError:
+            orders = {}
+            self.missed += 1
+        del pending[timestamp]
+        self.market.settle(timestamp, orders, books)
+        # Resting orders only meet the market trades of the next tick. Fill them now rather than when the next
+        # state is built, which in pipelined mode has already happened and may be many ticks later.
+        self.market.fill_resting(self.trades.get(self.following.get(timestamp), {}))
+
+    def report(self, elapsed: float) -> str:
+        if self.lockstep:
+            lines = [self.market.report()]
+        else:
+            ticks = len(self.books)
+            lines = [f'pipelined run, PnL not comparable with lockstep or replay runs: {self.stale} of {ticks} states '
+                     f'were built before the earlier ticks were settled',
+                     self.market.report()]
+
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            percentile = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1e6
+            lines.append(f'end to end: {len(latencies)} ticks in {elapsed:.2f}s ({len(latencies) / elapsed:.0f} ticks/s), '
+                         f'p50 {percentile(0.5):.0f}us, p99 {percentile(0.99):.0f}us, max {latencies[-1] * 1e6:.0f}us')
+        lines.append(f'missed {self.missed} ticks, {self.late} late order messages')
+
+        return '\n'.join(lines)
+
+
+END = b'{"end":true}\n'
+
+
+async def run_trader(trader, host: str, port: int, max_queued: int = 16) -> int:
+    """
+    Connects a Trader to the exchange and answers every state with its orders. Returns the number of ticks traded.
+
+    States wait in a bounded queue between the socket and the trader: when the trader falls behind the queue fills up,
+    the socket stops being read and the exchange has to wait.
+    """
+    reader, writer = await asyncio.open_connection(host, port, limit=2 ** 22)
+    incoming: asyncio.Queue = asyncio.Queue(maxsize=max_queued)
+
+    async def read() -> None:
+        while True:
+            line = await reader.readline()
+            await incoming.put(line)
+            if not line or line == END:
+                return
+
+    reading = asyncio.create_task(read())
+    ticks = 0
+
+    while True:
+        line = await incoming.get()
+        if not line or line == END:
+            break
+
+        state = parse_state(json.loads(line)['state'])
+        with redirect_stdout(io.StringIO()):
+            orders = trader.run(state)
+
+        writer.write((json.dumps({'timestamp': state.timestamp, 'orders': orders}, cls=ProsperityEncoder, separators=(',', ':')) + '\n').encode())
+        await writer.drain()
+        ticks += 1
+
+    await reading
+    writer.close()
+    return ticks
+
+
+async def main(module_name: str, round: int, day: int, speed: float, lockstep: bool) -> None:
+    exchange = LocalExchange(*day_files(round, day), speed=speed, lockstep=lockstep)
+    server = await exchange.serve()
+    host, port = server.sockets[0].getsockname()[:2]
+
+    start = time.perf_counter()
+    await run_trader(importlib.import_module(module_name).Trader(), host, port)
+    await exchange.done.wait()
+    elapsed = time.perf_counter() - start
+
+    server.close()
+    await server.wait_closed()
+    print(exchange.report(elapsed))
+
+
+if __name__ == '__main__':
+    # python live.py sample_trader_round4 1 0 [ticks per second, 0 = as fast as possible] [pipelined]
+    speed = float(sys.argv[4]) if len(sys.argv) > 4 else 0
+    lockstep = not (len(sys.argv) > 5 and sys.argv[5] == 'pipelined')
+    asyncio.run(main(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), speed, lockstep))
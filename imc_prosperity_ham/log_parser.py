@@ -0,0 +1,135 @@
+import json
+import sys
+import time
+from typing import Dict, Iterator, List, Tuple
+from datamodel import Listing, OrderDepth, TradingState, Order, Trade, Symbol
+from result_store import ResultStore, RunWriter
+
+
+def read_log_lines(file) -> Iterator[dict]:
+    """
+    Streams the {"state":...,"orders":...,"logs":...} objects printed by Logger.flush out of a submission log,
+    one line at a time, so the log is never loaded in memory as a whole.
+
+    Accepts both a file of raw Logger.flush lines and the exchange's sandbox log, where each of our lines
+    is the string value of a "lambdaLog" field. Any other line is skipped.
+    """
+    decoder = json.JSONDecoder()
+
+    with open(file, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+
+            if line.startswith('"lambdaLog"'):
+                # "lambdaLog": "{\"logs\":...}",
+                value, _ = decoder.raw_decode(line, line.index('"', line.index(':')))
+                line = value.strip()
+
+            if not line.startswith('{"logs"'):
+                continue
+
+            yield json.loads(line)
+
+
+def parse_trades(trades: Dict[str, List[dict]]) -> Dict[Symbol, List[Trade]]:
+    return {
+        symbol: [Trade(trade['symbol'], trade['price'], trade['quantity'], trade.get('buyer', ''), trade.get('seller', '')) for trade in symbol_trades]
+        for symbol, symbol_trades in trades.items()
+    }
+
+
+def parse_state(data: dict) -> TradingState:
+    """
+    Rebuilds the TradingState from the "state" object of a Logger.flush line
+    """
+    listings = {
+        symbol: Listing(listing['symbol'], listing['product'], listing['denomination'])
+        for symbol, listing in data['listings'].items()
+    }
+
+    order_depths = {}
+    for symbol, depth in data['order_depths'].items():
+        order_depth = OrderDepth()
+        # JSON object keys are strings, prices are ints on the exchange
+        order_depth.buy_orders = {int(price): volume for price, volume in depth['buy_orders'].items()}
+        order_depth.sell_orders = {int(price): volume for price, volume in depth['sell_orders'].items()}
+        order_depths[symbol] = order_depth
+
+    return TradingState(
+        data['timestamp'],
+        listings,
+        order_depths,
+        parse_trades(data['own_trades']),
+        parse_trades(data['market_trades']),
+        dict(data['position']),
+        dict(data['observations']),
+    )
+
+
+def parse_orders(data: Dict[str, List[dict]]) -> Dict[Symbol, List[Order]]:
+    return {symbol: [Order(order['symbol'], order['price'], order['quantity']) for order in orders] for symbol, orders in data.items()}
+
+
+def read_submission_log(file) -> Iterator[Tuple[TradingState, Dict[Symbol, List[Order]], str]]:
+    """
+    Streams (state, orders sent, log output) for every tick of a submission log
+    """
+    for data in read_log_lines(file):
+        yield parse_state(data['state']), parse_orders(data['orders']), data['logs']
+
+
+def log_to_store(file, run: RunWriter) -> int:
+    """
+    Writes a submission log into the result store, without building the datamodel objects:
+    own fills, positions, orders sent and log output of every tick. Returns the number of ticks.
+
+    Orders are stored in the orders table with the same columns as the fills. A fill is stamped with
+    the timestamp of the tick whose orders it filled, like the replay engine does: the fills of the
+    orders sent at tick t only arrive in the state of the next tick.
+    """
+    ticks = 0
+    previous = None
+
+    for data in read_log_lines(file):
+        state = data['state']
+        timestamp = state['timestamp']
+
+        for symbol, trades in state['own_trades'].items():
+            for trade in trades:
+                # Our own sells are stored as negative quantities, like the replay engine does
+                quantity = trade['quantity'] if trade.get('buyer') == 'SUBMISSION' else -trade['quantity']
+                filled_at = trade.get('timestamp', previous if previous is not None else timestamp)
+                run.append('fills', symbol, filled_at, trade['price'], quantity)
+
+        for product, position in state['position'].items():
+            run.append('position', product, timestamp, position)
+
+        for symbol, orders in data['orders'].items():
+            for order in orders:
+                run.append('orders', order['symbol'], timestamp, order['price'], order['quantity'])
+
+        run.log(timestamp, data['logs'])
+        previous = timestamp
+
+        ticks += 1
+        if ticks % 1000 == 0:
+            run.flush()
+
+    run.flush()
+    return ticks
+
+
+if __name__ == '__main__':
+    # python log_parser.py <submission log> [store directory] [run name]
+    file = sys.argv[1]
+
+    start = time.perf_counter()
+    if len(sys.argv) > 2:
+        run = ResultStore(sys.argv[2]).open_run(sys.argv[3] if len(sys.argv) > 3 else f'exchange_{time.strftime("%Y%m%d_%H%M%S")}')
+        ticks = log_to_store(file, run)
+        run.close()
+    else:
+        ticks = sum(1 for _ in read_submission_log(file))
+    elapsed = time.perf_counter() - start
+
+    print(f'{ticks} ticks in {elapsed:.2f}s, {ticks / elapsed:.0f} ticks/s')
@@ -0,0 +1,160 @@
+import math
+import multiprocessing
+import os
+import sys
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from datamodel import OrderDepth, Trade, Symbol
+from fake_market import FakeMarket, day_files, read_prices, read_trades
+from tournament import load_trader
+
+# Columns of the prices matrix: timestamp, product index, then price and volume of 3 bid levels,
+# 3 ask levels and the mid price. Missing levels are NaN.
+PRICE_COLUMNS = 2 + 12 + 1
+# Columns of the trades matrix: timestamp, product index, price, quantity
+TRADE_COLUMNS = 4
+
+# Day decoded from shared memory, once per worker process
+_books = None
+_trades = None
+_module_name = None
+
+
+def pack_day(books, trades) -> Tuple[shared_memory.SharedMemory, tuple]:
+    """
+    Copies a day read with read_prices and read_trades into one shared memory block of float64 rows,
+    which every worker maps instead of receiving a pickled copy
+
+    Returns:
+    (the block, its layout) where the layout is what unpack_day needs and is cheap to send to workers.
+    The caller must close and unlink the block.
+    """
+    symbols = sorted({symbol for products in books.values() for symbol in products} | {symbol for products in trades.values() for symbol in products})
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    price_rows = []
+    for timestamp, products in books.items():
+        for symbol, (order_depth, mid) in products.items():
+            row = [timestamp, index[symbol]] + [math.nan] * 12 + [mid]
+            for level, (price, volume) in enumerate(sorted(order_depth.buy_orders.items(), reverse=True)[:3]):
+                row[2 + 2 * level:4 + 2 * level] = price, volume
+            for level, (price, volume) in enumerate(sorted(order_depth.sell_orders.items())[:3]):
+                row[8 + 2 * level:10 + 2 * level] = price, volume
+            price_rows.append(row)
+
+    trade_rows = [[timestamp, index[symbol], trade.price, trade.quantity]
+                  for timestamp, products in trades.items() for symbol, symbol_trades in products.items() for trade in symbol_trades]
+
+    prices = np.array(price_rows, dtype=np.float64).reshape(-1, PRICE_COLUMNS)
+    day_trades = np.array(trade_rows, dtype=np.float64).reshape(-1, TRADE_COLUMNS)
+
+    block = shared_memory.SharedMemory(create=True, size=max(1, prices.nbytes + day_trades.nbytes))
+    np.ndarray(prices.shape, np.float64, block.buf)[:] = prices
+    np.ndarray(day_trades.shape, np.float64, block.buf, offset=prices.nbytes)[:] = day_trades
+
+    return block, (block.name, symbols, prices.shape, day_trades.shape)
+
+
+def unpack_day(buffer, layout: tuple) -> Tuple[Dict[int, Dict[Symbol, Tuple[OrderDepth, float]]], Dict[int, Dict[Symbol, List[Trade]]]]:
+    """
+    Rebuilds the books and trades dicts of FakeMarket.replay from the rows of a shared block
+    """
+    _, symbols, prices_shape, trades_shape = layout
+    prices = np.ndarray(prices_shape, np.float64, buffer)
+    day_trades = np.ndarray(trades_shape, np.float64, buffer, offset=prices.nbytes)
+
+    books: Dict[int, Dict[Symbol, Tuple[OrderDepth, float]]] = {}
+    for row in prices.tolist():
+        order_depth = OrderDepth()
+        for level in range(3):
+            if not math.isnan(row[2 + 2 * level]):
+                order_depth.buy_orders[int(row[2 + 2 * level])] = int(row[3 + 2 * level])
+            if not math.isnan(row[8 + 2 * level]):
+                order_depth.sell_orders[int(row[8 + 2 * level])] = int(row[9 + 2 * level])
+        books.setdefault(int(row[0]), {})[symbols[int(row[1])]] = (order_depth, row[14])
+
+    trades: Dict[int, Dict[Symbol, List[Trade]]] = {}
+    for timestamp, symbol_index, price, quantity in day_trades.tolist():
+        symbol = symbols[int(symbol_index)]
+        trades.setdefault(int(timestamp), {}).setdefault(symbol, []).append(Trade(symbol, int(price), int(quantity), '', ''))
+
+    return books, trades
+
+
+def attach(layout: tuple, module_name: str) -> None:
+    """
+    Pool initializer: maps the shared block and decodes it once for all the runs of this worker
+    """
+    global _books, _trades, _module_name
+    block = shared_memory.SharedMemory(name=layout[0])
+    _books, _trades = unpack_day(block.buf, layout)
+    _module_name = module_name
+    block.close()
+
+
+def simulate(job: tuple) -> Dict[Symbol, float]:
+    """
+    One perturbed replay with a fresh trader, returns its PnL per product
+    """
+    seed, fill_probability, slippage, drop_probability = job
+    market = FakeMarket(load_trader(_module_name, seed), fill_probability=fill_probability, slippage=slippage,
+                        drop_probability=drop_probability, seed=seed)
+    return market.replay(_books, _trades)
+
+
+def monte_carlo(module_name: str, round: int, day: int, runs: int = 100, fill_probability: float = 0.5, slippage: int = 1,
+                drop_probability: float = 0.01, processes: Optional[int] = None) -> Tuple[Dict[Symbol, float], List[Dict[Symbol, float]]]:
+    """
+    Replays a day `runs` times with randomized passive fills, slippage and dropped ticks, spread over a process pool.
+    Run i uses seed i, so a run can be reproduced on its own with FakeMarket(..., seed=i).
+
+    Returns:
+    (PnL per product of the unperturbed replay, PnL per product of every perturbed run)
+    """
+    prices, trades = day_files(round, day)
+    books, day_trades = read_prices(prices), read_trades(trades)
+    baseline = FakeMarket(load_trader(module_name, runs)).replay(books, day_trades)
+
+    block, layout = pack_day(books, day_trades)
+    try:
+        jobs = [(seed, fill_probability, slippage, drop_probability) for seed in range(runs)]
+        with multiprocessing.get_context('spawn').Pool(processes or os.cpu_count() or 1, attach, (layout, module_name)) as pool:
+            results = pool.map(simulate, jobs)
+    finally:
+        block.close()
+        block.unlink()
+
+    return baseline, results
+
+
+def distribution_report(baseline: Dict[Symbol, float], results: List[Dict[Symbol, float]]) -> str:
+    lines = [f'{"product":<15} {"replay":>10} {"mean":>10} {"std":>9} {"p5":>10} {"p50":>10} {"p95":>10} {"loss":>6}']
+    products = sorted(set(baseline) | {product for result in results for product in result})
+
+    for product in products + ['TOTAL']:
+        if product == 'TOTAL':
+            pnl = np.array([sum(result.values()) for result in results])
+            replay = sum(baseline.values())
+        else:
+            pnl = np.array([result.get(product, 0.0) for result in results])
+            replay = baseline.get(product, 0.0)
+        p5, p50, p95 = np.percentile(pnl, [5, 50, 95])
+        lines.append(f'{product:<15} {replay:>10.1f} {pnl.mean():>10.1f} {pnl.std():>9.1f} {p5:>10.1f} {p50:>10.1f} {p95:>10.1f} {(pnl < 0).mean():>6.0%}')
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # python monte_carlo.py sample_trader_round4 2 1 [runs] [fill probability] [slippage ticks] [drop probability]
+    module_name, round, day = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 100
+    fill_probability = float(sys.argv[5]) if len(sys.argv) > 5 else 0.5
+    slippage = int(sys.argv[6]) if len(sys.argv) > 6 else 1
+    drop_probability = float(sys.argv[7]) if len(sys.argv) > 7 else 0.01
+
+    start = time.perf_counter()
+    baseline, results = monte_carlo(module_name, round, day, runs, fill_probability, slippage, drop_probability)
+    print(distribution_report(baseline, results))
+    print(f'{runs} runs in {time.perf_counter() - start:.1f}s')
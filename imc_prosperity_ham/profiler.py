@@ -0,0 +1,208 @@
+import importlib
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from fake_market import FakeMarket, day_files, read_prices, read_trades
+
+# Samples outside of Trader.run, i.e. the replay engine itself
+MARKET = 'market'
+
+
+class StackSampler:
+    """
+    Statistical profiler: a CPU time timer interrupts the program every `interval` seconds and the signal handler
+    records the Python stack at that point. Nothing runs between samples, so the overhead stays low however
+    many functions are called.
+
+    Samples are grouped by strategy: the innermost process_* method on the stack, otherwise the first
+    function called by Trader.run (Logger.flush, OrderSizer.clip...), otherwise "run" itself, or "market"
+    when the trader was not running. Stacks are stored collapsed, "frame;frame;frame" -> samples,
+    starting at the replay loop.
+
+    Frames are named "module:qualified name", with the trader module shown as "trader" so that two versions
+    of a trader give the same frame names. With lines, the leaf frame gets its line number too, which is how
+    time spent in builtins such as sorted() or json.dumps shows up: on the line that calls them.
+
+    The kernel may round the interval up to its timer tick. Only works in the main thread on platforms with
+    setitimer (not Windows).
+    """
+    def __init__(self, trader_module: str, interval: float = 0.001, lines: bool = True) -> None:
+        self.trader_module = trader_module
+        self.interval = interval
+        self.lines = lines
+        self.stacks: Dict[str, Counter] = {}
+        self.samples = 0
+        # Frame names by code object, building them is the expensive part of a sample
+        self.names: Dict[object, str] = {}
+
+    def __enter__(self) -> 'StackSampler':
+        self.previous = signal.signal(signal.SIGPROF, self.sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.previous)
+
+    def frame_name(self, code) -> str:
+        name = self.names.get(code)
+        if name is None:
+            module = os.path.splitext(os.path.basename(code.co_filename))[0]
+            if module == '__init__':
+                module = os.path.basename(os.path.dirname(code.co_filename))
+            if module == self.trader_module:
+                module = 'trader'
+            name = self.names[code] = f'{module}:{code.co_qualname}'
+        return name
+
+    def sample(self, signum, frame) -> None:
+        self.samples += 1
+        codes = []
+        while frame is not None:
+            codes.append((frame.f_code, frame.f_lineno))
+            if frame.f_code.co_name == 'replay':
+                break
+            frame = frame.f_back
+        codes.reverse()
+
+        names = [self.frame_name(code) for code, _ in codes]
+        if self.lines:
+            names[-1] = f'{names[-1]}:{codes[-1][1]}'
+
+        strategy = MARKET
+        for depth, (code, _) in enumerate(codes):
+            if code.co_name == 'run' and names[depth].startswith('trader:'):
+                strategy = names[depth + 1].split(':')[1] if depth + 1 < len(names) else 'run'
+            elif code.co_name.startswith('process_'):
+                strategy = code.co_name
+
+        self.stacks.setdefault(strategy, Counter())[';'.join(names)] += 1
+
+    def write(self, directory: str) -> List[str]:
+        """
+        Writes one collapsed stack file per strategy, plus all.folded with every sample under its strategy name,
+        in the format read by flamegraph.pl and speedscope
+
+        Returns:
+        The files written
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        everything: Counter = Counter()
+
+        for strategy, stacks in self.stacks.items():
+            files.append(write_folded(os.path.join(directory, f'{strategy}.folded'), stacks))
+            for stack, count in stacks.items():
+                everything[f'{strategy};{stack}'] += count
+
+        files.append(write_folded(os.path.join(directory, 'all.folded'), everything))
+        return files
+
+
+def write_folded(file: str, stacks: Counter) -> str:
+    with open(file, 'w') as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f'{stack} {count}\n')
+    return file
+
+
+def read_folded(file: str) -> Counter:
+    stacks: Counter = Counter()
+    with open(file) as f:
+        for line in f:
+            stack, _, count = line.rstrip('\n').rpartition(' ')
+            stacks[stack] += int(count)
+    return stacks
+
+
+def profile_day(module_name: str, round: int, day: int, interval: float = 0.001, lines: bool = True) -> Tuple[StackSampler, FakeMarket]:
+    """
+    Replays a day under the sampler. The files are read before sampling starts, so only the replay is profiled.
+    """
+    prices, trades = day_files(round, day)
+    books, day_trades = read_prices(prices), read_trades(trades)
+    market = FakeMarket(importlib.import_module(module_name).Trader())
+
+    with StackSampler(module_name, interval, lines) as sampler:
+        market.replay(books, day_trades)
+
+    return sampler, market
+
+
+def self_times(stacks: Counter) -> Counter:
+    """
+    Samples where each frame was the leaf, with line numbers dropped
+    """
+    times: Counter = Counter()
+    for stack, count in stacks.items():
+        leaf = stack.rsplit(';', 1)[-1]
+        times[leaf.rsplit(':', 1)[0] if leaf.count(':') > 1 else leaf] += count
+    return times
+
+
+def diff_folded(before: Counter, after: Counter) -> List[Tuple[str, int, int]]:
+    """
+    Every stack with its samples before and after, the input of flamegraph's differential mode (difffolded).
+    Counts of `after` are scaled to the same total as `before`, so that a run that took more samples overall
+    does not look slower everywhere.
+    """
+    scale = sum(before.values()) / max(1, sum(after.values()))
+    return [(stack, before.get(stack, 0), round(after.get(stack, 0) * scale)) for stack in sorted(set(before) | set(after))]
+
+
+def diff_report(before: Counter, after: Counter, top: int = 15) -> str:
+    """
+    Share of the samples per strategy and per self time frame, before and after, biggest changes first
+    """
+    lines = []
+    total_before = max(1, sum(before.values()))
+    total_after = max(1, sum(after.values()))
+
+    strategies_before: Counter = Counter()
+    strategies_after: Counter = Counter()
+    for stack, count in before.items():
+        strategies_before[stack.split(';', 1)[0]] += count
+    for stack, count in after.items():
+        strategies_after[stack.split(';', 1)[0]] += count
+
+    for title, a, b in (('strategy', strategies_before, strategies_after), ('self time', self_times(before), self_times(after))):
+        lines.append(f'{title:<60} {"before":>7} {"after":>7} {"change":>7}')
+        changes = sorted(set(a) | set(b), key=lambda key: -abs(b.get(key, 0) / total_after - a.get(key, 0) / total_before))
+        for key in changes[:top]:
+            share_a = a.get(key, 0) / total_before
+            share_b = b.get(key, 0) / total_after
+            lines.append(f'{key[:60]:<60} {share_a:>7.1%} {share_b:>7.1%} {share_b - share_a:>+7.1%}')
+        lines.append('')
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # python profiler.py sample_trader_round4 2 1 <output directory> [interval seconds]
+    # python profiler.py diff <before directory> <after directory> [differential folded output file]
+    if sys.argv[1] == 'diff':
+        before = read_folded(os.path.join(sys.argv[2], 'all.folded'))
+        after = read_folded(os.path.join(sys.argv[3], 'all.folded'))
+        print(diff_report(before, after))
+        if len(sys.argv) > 4:
+            with open(sys.argv[4], 'w') as f:
+                for stack, count_before, count_after in diff_folded(before, after):
+                    f.write(f'{stack} {count_before} {count_after}\n')
+        sys.exit()
+
+    module_name, round, day, directory = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+    interval: Optional[float] = float(sys.argv[5]) if len(sys.argv) > 5 else 0.001
+
+    start = time.perf_counter()
+    sampler, market = profile_day(module_name, round, day, interval)
+    elapsed = time.perf_counter() - start
+
+    print(market.report())
+    print(f'{sampler.samples} samples in {elapsed:.1f}s')
+    for strategy, stacks in sorted(sampler.stacks.items(), key=lambda item: -sum(item[1].values())):
+        print(f'  {strategy:<28} {sum(stacks.values()) / max(1, sampler.samples):>6.1%}')
+    for file in sampler.write(directory):
+        print(f'wrote {file}')
@@ -0,0 +1,48 @@
+from typing import List
+from datamodel import Order, Symbol, Position
+
+
+class Quoter:
+    """
+    Market making around a fixed fair value. Posts a passive bid and ask every tick, both shifted
+    against our inventory so that a long position is more likely to be sold than increased, and the other way around.
+    Costs O(1) per tick, the order book is not scanned.
+    """
+    def __init__(self, product: Symbol, fair_value: int, limit: int, edge: int = 2, max_skew: int = 2) -> None:
+        """
+        Parameters:
+        product: Symbol
+            product to quote, i.e. "PEARLS"
+        fair_value: int
+            Price the quotes are centered on
+        limit: int
+            Position limit of the product
+        edge: int
+            Distance of each quote from the fair value when flat
+        max_skew: int
+            How far the quotes move when the position is at the limit
+        """
+        self.product = product
+        self.fair_value = fair_value
+        self.limit = limit
+        self.edge = edge
+        self.max_skew = max_skew
+
+    def quote(self, position: Position) -> List[Order]:
+        skew = round(self.max_skew * position / self.limit)
+
+        # Never quote through the fair value, whatever the inventory
+        bid = min(self.fair_value - self.edge - skew, self.fair_value - 1)
+        ask = max(self.fair_value + self.edge - skew, self.fair_value + 1)
+
+        orders: List[Order] = []
+
+        buy_room = self.limit - position
+        if buy_room > 0:
+            orders.append(Order(self.product, bid, buy_room))
+
+        sell_room = self.limit + position
+        if sell_room > 0:
+            orders.append(Order(self.product, ask, -sell_room))
+
+        return orders
@@ -0,0 +1,211 @@
+import itertools
+from typing import Dict, List, Optional, Tuple
+from lazy import lazy_import
+
+# Only the offline tuning reads csv files, the traders importing the detectors do not pay for it at startup
+csv = lazy_import('csv')
+
+# Timestamps advance by this much per tick on the exchange
+TICK = 100
+
+
+class Cusum:
+    """
+    Two-sided CUSUM change detector, O(1) per update.
+
+    Deviations of the series from its exponentially weighted mean are accumulated separately upwards and downwards,
+    minus a drift allowance. When one of the sums crosses the threshold a change in that direction is flagged and both sums restart.
+
+    Everything is keyed on the timestamp rather than on the number of calls: an update covering several ticks counts for
+    that many ticks, and updates that do not move the timestamp forward (repeated or replayed ticks) are ignored.
+    """
+    def __init__(self, threshold: float, drift: float = 0.0, alpha: float = 0.01) -> None:
+        """
+        Parameters:
+        threshold: float
+            Accumulated deviation (price x ticks) needed to flag a change
+        drift: float
+            Deviation per tick that is considered noise
+        alpha: float
+            Weight of a new value in the mean, per tick
+        """
+        self.threshold = threshold
+        self.drift = drift
+        self.alpha = alpha
+
+        self.mean: Optional[float] = None
+        self.high = 0.0
+        self.low = 0.0
+        self.last_timestamp: Optional[int] = None
+
+    def update(self, timestamp: int, value: float) -> int:
+        """
+        Returns 1 if an upward change is flagged, -1 for a downward change, 0 otherwise
+        """
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return 0
+
+        if self.mean is None:
+            self.mean = value
+            self.last_timestamp = timestamp
+            return 0
+
+        ticks = (timestamp - self.last_timestamp) / TICK
+        self.last_timestamp = timestamp
+
+        deviation = value - self.mean
+        self.high = max(0.0, self.high + (deviation - self.drift) * ticks)
+        self.low = max(0.0, self.low - (deviation + self.drift) * ticks)
+        self.mean += (1 - (1 - self.alpha) ** ticks) * deviation
+
+        if self.high > self.threshold:
+            self.high = self.low = 0.0
+            return 1
+        if self.low > self.threshold:
+            self.high = self.low = 0.0
+            return -1
+        return 0
+
+
+class RegimeDetector:
+    """
+    Keeps the direction of the last change flagged by a Cusum, and remembers the first peak:
+    the first time a rising regime turns into a falling one.
+    """
+    def __init__(self, threshold: float, drift: float = 0.0, alpha: float = 0.01) -> None:
+        self.cusum = Cusum(threshold, drift, alpha)
+
+        self.regime = 0
+        self.changed_at: Optional[int] = None
+        self.peaked_at: Optional[int] = None
+
+    def update(self, timestamp: int, value: float) -> int:
+        """
+        Returns the change flagged by this update, like Cusum.update
+        """
+        change = self.cusum.update(timestamp, value)
+
+        if change != 0:
+            if change == -1 and self.regime == 1 and self.peaked_at is None:
+                self.peaked_at = timestamp
+            if change != self.regime:
+                self.changed_at = timestamp
+            self.regime = change
+
+        return change
+
+
+def trade_prices(file, symbol) -> List[Tuple[int, float]]:
+    """
+    Volume weighted price of a symbol at every timestamp it traded in a trades csv
+    """
+    totals: Dict[int, Tuple[float, int]] = {}
+    with open(file, newline='') as f:
+        for row in csv.DictReader(f, delimiter=';'):
+            if row['symbol'] == symbol:
+                total, quantity = totals.get(int(row['timestamp']), (0.0, 0))
+                totals[int(row['timestamp'])] = (total + float(row['price']) * int(row['quantity']), quantity + int(row['quantity']))
+
+    return [(timestamp, total / quantity) for timestamp, (total, quantity) in sorted(totals.items())]
+
+
+def berries_peak(prices: List[Tuple[int, float]]) -> int:
+    """
+    Timestamp of the highest berries price, smoothed over 50 trades on each side (only where the window is full)
+    """
+    smoothed = {i: sum(price for _, price in prices[i - 50:i + 51]) / 101 for i in range(50, len(prices) - 50)}
+    return prices[max(smoothed, key=smoothed.get)][0]
+
+
+def peak_lags(parameters: Dict[str, float], days: List[List[Tuple[int, float]]]) -> List[Optional[int]]:
+    """
+    How long after the smoothed peak a RegimeDetector with these parameters flags it, per day of trade prices.
+    Negative when it flags before the peak, None when it never does.
+    """
+    lags = []
+    for prices in days:
+        detector = RegimeDetector(**parameters)
+        for timestamp, price in prices:
+            detector.update(timestamp, price)
+        lags.append(None if detector.peaked_at is None else detector.peaked_at - berries_peak(prices))
+    return lags
+
+
+def tune_berries(days: List[List[Tuple[int, float]]], grid: Dict[str, list]) -> Tuple[Dict[str, float], List[Optional[int]]]:
+    """
+    Parameters of the grid that flag the peak soonest on the worst day (then on average), among those that flag it
+    at least PEAK_MARGIN after the smoothed peak on every day
+
+    Returns:
+    (parameters, lag per day), parameters is None if no set of the grid qualifies
+    """
+    best, best_lags, best_score = None, [], None
+    names = list(grid)
+    for values in itertools.product(*(grid[name] for name in names)):
+        parameters = dict(zip(names, values))
+        lags = peak_lags(parameters, days)
+        if any(lag is None or lag < PEAK_MARGIN for lag in lags):
+            continue
+        score = (max(lags), sum(lags) / len(lags))
+        if best_score is None or score < best_score:
+            best, best_lags, best_score = parameters, lags, score
+    return best, best_lags
+
+
+# The smoothed peak is only known to within about this many timestamps (50 trades are ~85000),
+# so a flag closer after it than this may as well be early, which sells berries while they still rise
+PEAK_MARGIN = 40000
+BERRIES_GRID = dict(threshold=[250, 500, 1000, 2000, 4000, 8000], drift=[0, 1, 2, 4, 8], alpha=[0.002, 0.005, 0.01, 0.02, 0.05])
+# Tuned with tune_berries on round 3 days 0-2 only. Round 4 day 3 is held out (round 4 days 1 and 2 repeat round 3's
+# berries trades): the peak is flagged 64600-95900 after it on the tuning days and 76000 after it on the held-out day.
+# The earlier threshold=1000, drift=2, alpha=0.01 flagged 29100-72900 after the peak in sample, and 279400 before it held out.
+BERRIES_PARAMETERS = dict(threshold=1000, drift=4, alpha=0.005)
+# Flags the large DIVING_GEAR moves that follow the sightings, 2-8 per day
+DIVING_GEAR_JUMP_PARAMETERS = dict(threshold=6000, drift=40, alpha=0.02)
+# NOT VALIDATED: the recorded data has no dolphin sightings series (they only reach the trader as
+# state.observations on the exchange), so nothing checks these. They are a hand-scaled guess for jumps of
+# ~10 sightings around ~3000, to be tuned on a submission log before they are trusted. Until then the
+# round 4 trader only logs the jumps (Trader.TRADE_DOLPHIN_JUMPS).
+DOLPHIN_JUMP_PARAMETERS = dict(threshold=20, drift=2, alpha=0.2)
+
+
+if __name__ == '__main__':
+    # python regime.py [trades csv files to score, default the tuning days and the held-out day]
+    import glob
+    import os
+    import sys
+    import time
+
+    # The recorded data has no prices files or dolphin sightings for rounds 3 and 4, so the benchmark runs on the
+    # trade tapes, and uses DIVING_GEAR (which follows the sightings) to check the jump detector.
+    data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+    tuning = sorted(glob.glob(os.path.join(data_dir, 'island-data-bottle-round-3', 'trades_round_3_day_*_nn.csv')))
+    held_out = [os.path.join(data_dir, 'island-data-bottle-round-4', 'trades_round_4_day_3_nn.csv')]
+    files = sys.argv[1:] or tuning + held_out
+
+    if not sys.argv[1:]:
+        tuned, lags = tune_berries([trade_prices(file, 'BERRIES') for file in tuning], BERRIES_GRID)
+        print(f'BERRIES tuned on {len(tuning)} days: {tuned}, flagged {lags} after the peak'
+              + ('' if tuned == BERRIES_PARAMETERS else f', BERRIES_PARAMETERS is {BERRIES_PARAMETERS}'))
+
+    for file in files:
+        print(os.path.basename(file) + (' (tuning day)' if file in tuning else ' (held out)' if file in held_out else ''))
+
+        berries = trade_prices(file, 'BERRIES')
+        detector = RegimeDetector(**BERRIES_PARAMETERS)
+        start = time.perf_counter()
+        for timestamp, price in berries:
+            detector.update(timestamp, price)
+        elapsed = time.perf_counter() - start
+        print(f'  BERRIES peak at {berries_peak(berries)}, flagged at {detector.peaked_at}, {elapsed / len(berries) * 1e6:.1f}us per update')
+
+        diving = trade_prices(file, 'DIVING_GEAR')
+        detector = RegimeDetector(**DIVING_GEAR_JUMP_PARAMETERS)
+        jumps = []
+        for i, (timestamp, price) in enumerate(diving):
+            change = detector.update(timestamp, price)
+            if change:
+                # How far the price moved in the flagged direction over the next 40 trades
+                later = diving[min(i + 40, len(diving) - 1)][1]
+                jumps.append(f'{timestamp}:{change * (later - price):+.0f}')
+        print(f'  DIVING_GEAR jumps flagged (timestamp:move after): {len(jumps)} {" ".join(jumps)}')
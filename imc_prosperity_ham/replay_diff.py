@@ -0,0 +1,137 @@
+import importlib
+import io
+import sys
+import time
+from array import array
+from bisect import bisect_left
+from contextlib import redirect_stdout
+from hashlib import blake2b
+from typing import Dict, List, Optional, Tuple
+from datamodel import Order, Symbol
+from log_parser import read_submission_log
+
+
+def orders_digest(orders: List[Order]) -> int:
+    """
+    Digest of the orders sent for one product in one tick. The order of the list does not matter,
+    only which (price, quantity) pairs were sent.
+    """
+    key = ';'.join(sorted(f'{order.symbol},{order.price},{order.quantity}' for order in orders))
+    return int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little')
+
+
+def chain(previous: int, digest: int) -> int:
+    return int.from_bytes(blake2b(previous.to_bytes(8, 'little') + digest.to_bytes(8, 'little'), digest_size=8).digest(), 'little')
+
+
+class DigestTape:
+    """
+    Chained digests of the orders of every product, tick after tick. Entry i of a product's chain covers
+    all of its orders up to tick i, so two tapes agree up to tick i exactly when their chains do,
+    and the first divergence can be found by bisection instead of comparing every tick.
+    """
+    def __init__(self) -> None:
+        self.timestamps = array('q')
+        self.chains: Dict[Symbol, array] = {}
+
+    def append(self, timestamp: int, orders: Dict[Symbol, List[Order]]) -> None:
+        # Products without orders and products with an empty list are the same thing
+        by_symbol: Dict[Symbol, List[Order]] = {}
+        for symbol_orders in orders.values():
+            for order in symbol_orders:
+                by_symbol.setdefault(order.symbol, []).append(order)
+
+        tick = len(self.timestamps)
+        self.timestamps.append(timestamp)
+
+        for symbol in by_symbol:
+            if symbol not in self.chains:
+                self.chains[symbol] = array('Q', [0] * tick)
+
+        for symbol, symbol_chain in self.chains.items():
+            previous = symbol_chain[-1] if len(symbol_chain) else 0
+            symbol_chain.append(chain(previous, orders_digest(by_symbol.get(symbol, []))))
+
+    def chain_of(self, symbol: Symbol) -> array:
+        return self.chains.get(symbol, array('Q', [0] * len(self.timestamps)))
+
+
+def first_divergence(a: DigestTape, b: DigestTape) -> Optional[Tuple[int, Symbol]]:
+    """
+    Returns (timestamp, product) of the first tick where the two tapes sent different orders,
+    or None if they agree on every tick they both cover
+    """
+    ticks = min(len(a.timestamps), len(b.timestamps))
+    first: Optional[Tuple[int, Symbol]] = None
+
+    for symbol in sorted(set(a.chains) | set(b.chains)):
+        chain_a = a.chain_of(symbol)
+        chain_b = b.chain_of(symbol)
+
+        if ticks == 0 or chain_a[ticks - 1] == chain_b[ticks - 1]:
+            continue
+
+        # First tick whose chains differ: every later chain differs too
+        tick = bisect_left(range(ticks), True, key=lambda i: chain_a[i] != chain_b[i])
+        if first is None or tick < first[0]:
+            first = (tick, symbol)
+
+    if first is None:
+        return None
+    return a.timestamps[first[0]], first[1]
+
+
+def fresh_trader(module_name: str):
+    """
+    New Trader from a freshly loaded module, so that state kept in class attributes by a previous run does not leak in
+    """
+    module = importlib.reload(importlib.import_module(module_name))
+    return module.Trader()
+
+
+def build_tapes(file, module_name: str, until: Optional[int] = None) -> Tuple[DigestTape, DigestTape, Dict[Symbol, List[Order]], Dict[Symbol, List[Order]]]:
+    """
+    Streams the log once: runs the trader on every logged state and records the logged and replayed orders.
+
+    Returns:
+    (logged tape, replayed tape, logged orders, replayed orders) where the orders are those of the last tick read,
+    which is the tick at `until` if given
+    """
+    trader = fresh_trader(module_name)
+    logged = DigestTape()
+    replayed = DigestTape()
+    logged_orders: Dict[Symbol, List[Order]] = {}
+    replayed_orders: Dict[Symbol, List[Order]] = {}
+
+    for state, logged_orders, _ in read_submission_log(file):
+        with redirect_stdout(io.StringIO()):
+            replayed_orders = trader.run(state)
+
+        logged.append(state.timestamp, logged_orders)
+        replayed.append(state.timestamp, replayed_orders)
+
+        if until is not None and state.timestamp >= until:
+            break
+
+    return logged, replayed, logged_orders, replayed_orders
+
+
+if __name__ == '__main__':
+    # python replay_diff.py <submission log> sample_trader_round4
+    file, module_name = sys.argv[1], sys.argv[2]
+
+    start = time.perf_counter()
+    logged, replayed, _, _ = build_tapes(file, module_name)
+    divergence = first_divergence(logged, replayed)
+    elapsed = time.perf_counter() - start
+
+    if divergence is None:
+        print(f'{len(logged.timestamps)} ticks identical ({elapsed:.2f}s)')
+    else:
+        timestamp, symbol = divergence
+        print(f'first divergence at timestamp {timestamp} on {symbol} ({elapsed:.2f}s)')
+
+        # Replay once more up to that tick to show the orders themselves
+        _, _, logged_orders, replayed_orders = build_tapes(file, module_name, until=timestamp)
+        print('  logged:  ', [order for orders in logged_orders.values() for order in orders if order.symbol == symbol])
+        print('  replayed:', [order for orders in replayed_orders.values() for order in orders if order.symbol == symbol])
@@ -0,0 +1,215 @@
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from fake_market import DATA_DIR, Day, recorded_days
+
+# Intermediate results by key, so that scanning again with other thresholds does not recompute the rolling windows
+_cache: Dict[tuple, object] = {}
+
+
+def cached(key: tuple, compute: Callable):
+    if key not in _cache:
+        _cache[key] = compute()
+    return _cache[key]
+
+
+class DayPrices:
+    """
+    Mid prices of every product of one recorded day as a single (ticks, products) matrix,
+    so that a computation over all products or all pairs is one NumPy expression.
+    Ticks where a product had no mid price carry the previous one forward.
+    """
+    def __init__(self, day: Day, timestamps: np.ndarray, symbols: List[str], mids: np.ndarray) -> None:
+        self.day = day
+        self.timestamps = timestamps
+        self.symbols = symbols
+        self.mids = mids
+
+    def column(self, symbol: str) -> np.ndarray:
+        return self.mids[:, self.symbols.index(symbol)]
+
+
+def load_day(round: int, day: int) -> DayPrices:
+    def load() -> DayPrices:
+        # Only needed for parsing, everything after works on NumPy arrays
+        import pandas
+
+        file = os.path.join(DATA_DIR, f'island-data-bottle-round-{round}', f'prices_round_{round}_day_{day}.csv')
+        prices = pandas.read_csv(file, delimiter=';', usecols=['timestamp', 'product', 'mid_price'])
+        table = prices.pivot(index='timestamp', columns='product', values='mid_price').sort_index()
+
+        # A mid price of 0 means one side of the book was empty
+        mids = table.to_numpy(dtype=float, copy=True)
+        mids[mids == 0] = np.nan
+        forward_fill(mids)
+
+        return DayPrices((round, day), table.index.to_numpy(), list(table.columns), mids)
+
+    return cached(('day', round, day), load)
+
+
+def forward_fill(values: np.ndarray) -> None:
+    """
+    Replaces NaN with the last value above it, in place, column by column. NaN before the first value stays NaN.
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    values[:] = values[rows, np.arange(values.shape[1])]
+
+
+def standardize(prices: DayPrices, scale: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Mid prices divided by a constant per product, like mid_price / 15000 in the notebook,
+    or by the day's mean price of each product when no constant is given
+
+    Returns:
+    (ticks, products) matrix
+    """
+    if scale is None:
+        return cached(('standardized', prices.day), lambda: prices.mids / np.nanmean(prices.mids, axis=0))
+    divisors = np.array([scale.get(symbol, np.nan) for symbol in prices.symbols])
+    return prices.mids / divisors
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Mean of the last `window` rows for every column, NaN for the first window - 1 rows and for every window
+    holding a NaN, like pandas' rolling(window).mean(). A product without a price yet at the start of the day
+    (forward_fill leaves that gap) only blanks the windows that overlap it, not every later one.
+    """
+    sums = np.nancumsum(values, axis=0)
+    valid = np.cumsum(~np.isnan(values), axis=0)
+    result = np.full(values.shape, np.nan)
+    counts = np.zeros(values.shape, dtype=valid.dtype)
+    result[window - 1:] = sums[window - 1:]
+    result[window:] -= sums[:-window]
+    counts[window - 1:] = valid[window - 1:]
+    counts[window:] -= valid[:-window]
+    result[counts < window] = np.nan
+    return result / window
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Sample standard deviation of the last `window` rows for every column, like pandas' rolling(window).std().
+    Values are centred on their column mean first, which keeps the running sums from cancelling out.
+    """
+    centred = values - np.nanmean(values, axis=0)
+    mean = rolling_mean(centred, window)
+    mean_of_squares = rolling_mean(centred ** 2, window)
+    variance = np.maximum(mean_of_squares - mean ** 2, 0) * window / (window - 1)
+    return np.sqrt(variance)
+
+
+def all_pairs(symbols: Sequence[str]) -> List[Tuple[str, str]]:
+    return [(a, b) for i, a in enumerate(symbols) for b in symbols[i + 1:]]
+
+
+def pair_ratios(prices: DayPrices, pairs: Sequence[Tuple[str, str]], scale: Optional[Dict[str, float]] = None) -> np.ndarray:
+    """
+    Standardized price of the first product of each pair divided by that of the second
+
+    Returns:
+    (ticks, pairs) matrix
+    """
+    standardized = standardize(prices, scale)
+    first = [prices.symbols.index(a) for a, _ in pairs]
+    second = [prices.symbols.index(b) for _, b in pairs]
+    return standardized[:, first] / standardized[:, second]
+
+
+def zscore(ratio: np.ndarray, small: int = 50, big: int = 200) -> np.ndarray:
+    """
+    Distance between the short and the long moving average of the ratio, in long window standard deviations.
+    Same as the notebook's zscore_20_5 = (ratios_mavg5 - ratios_mavg20) / std_20.
+    """
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (rolling_mean(ratio, small) - rolling_mean(ratio, big)) / rolling_std(ratio, big)
+
+
+def signals(z: np.ndarray, threshold: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns:
+    (buy, sell) masks: buy the ratio where z < -threshold, sell it where z > threshold. NaN gives no signal.
+    """
+    return z < -threshold, z > threshold
+
+
+def pair_zscores(prices: DayPrices, small: int = 50, big: int = 200) -> Tuple[List[Tuple[str, str]], np.ndarray, np.ndarray]:
+    """
+    Ratios and z-scores of every pair of products of the day, mean-standardized
+
+    Returns:
+    (pairs, ratios, zscores) with one column per pair
+    """
+    def compute():
+        pairs = all_pairs(prices.symbols)
+        ratios = pair_ratios(prices, pairs)
+        return pairs, ratios, zscore(ratios, small, big)
+
+    return cached(('zscores', prices.day, small, big), compute)
+
+
+def scan_pairs(days: Optional[List[Day]] = None, small: int = 50, big: int = 200, threshold: float = 1.0, horizon: int = 100) -> List[Dict]:
+    """
+    Scores the z-score signals of every pair of products over every day: the relative move of the ratio over the
+    next `horizon` ticks, counted positive when it went the way the signal bet (up after a buy, down after a sell).
+
+    Returns:
+    One dict per pair with the days it traded on, the number of signals, their mean edge in basis points of the
+    ratio and a t statistic of that mean, best t statistic first
+    """
+    totals: Dict[Tuple[str, str], List[float]] = {}
+
+    for round, day in days or recorded_days():
+        prices = load_day(round, day)
+        pairs, ratios, z = pair_zscores(prices, small, big)
+        buy, sell = signals(z, threshold)
+
+        future = np.full(ratios.shape, np.nan)
+        future[:-horizon] = ratios[horizon:] / ratios[:-horizon] - 1
+        edge = np.where(buy, future, 0) - np.where(sell, future, 0)
+        counted = (buy | sell) & ~np.isnan(future)
+        edge[~counted] = 0
+
+        counts = counted.sum(axis=0)
+        sums = edge.sum(axis=0)
+        squares = (edge ** 2).sum(axis=0)
+        for pair, count, total, square in zip(pairs, counts, sums, squares):
+            pair_total = totals.setdefault(pair, [0, 0, 0.0, 0.0])
+            pair_total[0] += 1
+            pair_total[1] += count
+            pair_total[2] += total
+            pair_total[3] += square
+
+    results = []
+    for (a, b), (day_count, count, total, square) in totals.items():
+        mean = total / count if count else 0.0
+        variance = (square / count - mean ** 2) * count / (count - 1) if count > 1 else 0.0
+        t = mean / np.sqrt(variance / count) if variance > 0 else 0.0
+        results.append({'pair': f'{a}/{b}', 'days': day_count, 'signals': int(count), 'edge_bps': mean * 1e4, 't': float(t)})
+
+    return sorted(results, key=lambda result: -abs(result['t']))
+
+
+if __name__ == '__main__':
+    # python research.py [small window] [big window] [z threshold] [horizon ticks]
+    small = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    big = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    threshold = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    horizon = int(sys.argv[4]) if len(sys.argv) > 4 else 100
+
+    start = time.perf_counter()
+    results = scan_pairs(small=small, big=big, threshold=threshold, horizon=horizon)
+    first = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scan_pairs(small=small, big=big, threshold=threshold + 0.5, horizon=horizon)
+    again = time.perf_counter() - start
+
+    print(f'{"pair":<28} {"days":>4} {"signals":>8} {"edge bps":>9} {"t":>7}')
+    for result in results:
+        print(f'{result["pair"]:<28} {result["days"]:>4} {result["signals"]:>8} {result["edge_bps"]:>9.2f} {result["t"]:>7.2f}')
+    print(f'{len(results)} pairs over {len(recorded_days())} days in {first:.2f}s, {again:.2f}s again with another threshold (cached)')
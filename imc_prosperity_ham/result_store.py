@@ -0,0 +1,192 @@
+import mmap
+import os
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+# Columns of every table besides the timestamp, as (name, array typecode)
+TABLES = {
+    'fills': (('price', 'q'), ('quantity', 'q')),
+    'orders': (('price', 'q'), ('quantity', 'q')),
+    'position': (('position', 'q'),),
+    'pnl': (('pnl', 'd'),),
+    'latency': (('seconds', 'd'),),
+    'logs': (('offset', 'q'), ('length', 'q')),
+}
+
+# Partition of the tables that are not per product
+ALL = '_all'
+
+# Rows buffered per (table, partition) before they are written, so a crashed run only loses the last few
+FLUSH_ROWS = 1000
+
+
+class RunWriter:
+    """
+    Appends the output of one replay to the store. Every (table, partition) is a set of column files
+    next to each other, one value per row, and rows are only ever appended in timestamp order.
+    Rows are buffered in memory, each (table, partition) is written once flush_rows of its rows are waiting
+    and everything left by flush().
+    """
+    def __init__(self, path: str, flush_rows: int = FLUSH_ROWS) -> None:
+        self.path = path
+        self.flush_rows = flush_rows
+        os.makedirs(path, exist_ok=True)
+
+        self.buffers: Dict[tuple, Dict[str, array]] = {}
+        self.log_file = open(os.path.join(path, 'logs.txt'), 'ab')
+        self.log_offset = self.log_file.tell()
+
+    def append(self, table: str, partition: str, timestamp: int, *values) -> None:
+        buffer = self.buffers.get((table, partition))
+        if buffer is None:
+            buffer = {'timestamp': array('q')}
+            for name, typecode in TABLES[table]:
+                buffer[name] = array(typecode)
+            self.buffers[(table, partition)] = buffer
+
+        buffer['timestamp'].append(timestamp)
+        for (name, _), value in zip(TABLES[table], values):
+            buffer[name].append(value)
+
+        if len(buffer['timestamp']) >= self.flush_rows:
+            self.write(table, partition, buffer)
+
+    def log(self, timestamp: int, text: str) -> None:
+        """
+        Stores a tick's log output, the logs table only keeps where it is in logs.txt
+        """
+        if not text:
+            return
+
+        data = text.encode()
+        self.log_file.write(data)
+        self.append('logs', ALL, timestamp, self.log_offset, len(data))
+        self.log_offset += len(data)
+
+    def write(self, table: str, partition: str, buffer: Dict[str, array]) -> None:
+        if not buffer['timestamp']:
+            return
+        # The logs table points into logs.txt, which has to be on disk first
+        if table == 'logs':
+            self.log_file.flush()
+
+        os.makedirs(os.path.join(self.path, table), exist_ok=True)
+        for name, values in buffer.items():
+            with open(os.path.join(self.path, table, f'{partition}.{name}'), 'ab') as f:
+                values.tofile(f)
+            del values[:]
+
+    def flush(self) -> None:
+        self.log_file.flush()
+        for (table, partition), buffer in self.buffers.items():
+            self.write(table, partition, buffer)
+
+    def close(self) -> None:
+        self.flush()
+        self.log_file.close()
+
+
+class ResultStore:
+    """
+    Directory of replay results, one sub directory per run.
+
+    Timestamps are stored sorted, so a time range query binary searches the memory mapped timestamp
+    column and only reads the matching slice of the other columns, instead of scanning the whole run.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def open_run(self, name: str) -> RunWriter:
+        return RunWriter(os.path.join(self.path, name))
+
+    def runs(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.path) if os.path.isdir(os.path.join(self.path, name)))
+
+    def partitions(self, run: str, table: str) -> List[str]:
+        folder = os.path.join(self.path, run, table)
+        if not os.path.isdir(folder):
+            return []
+        return sorted({file.rsplit('.', 1)[0] for file in os.listdir(folder)})
+
+    def query(self, table: str, partition: str, start: int, end: int, runs: Optional[List[str]] = None) -> Dict[str, Dict[str, list]]:
+        """
+        Parameters:
+        table: str
+            One of TABLES, i.e. "pnl"
+        partition: str
+            Product, or ALL for the tables that are not per product
+        start: int
+            First timestamp included
+        end: int
+            Last timestamp included
+        runs: List[str]
+            Runs to look in, defaults to all of them
+
+        Returns:
+        Dict[run, Dict[column, list]] with the rows in the time range, runs without any are left out
+        """
+        result = {}
+
+        for run in runs if runs is not None else self.runs():
+            folder = os.path.join(self.path, run, table)
+            with self.column(folder, partition, 'timestamp', 'q') as timestamps:
+                if timestamps is None:
+                    continue
+                first = bisect_left(timestamps, start)
+                last = bisect_right(timestamps, end)
+                if first == last:
+                    continue
+                rows = {'timestamp': timestamps[first:last].tolist()}
+
+            for name, typecode in TABLES[table]:
+                with self.column(folder, partition, name, typecode) as values:
+                    rows[name] = values[first:last].tolist()
+            result[run] = rows
+
+        return result
+
+    def logs(self, run: str, start: int, end: int) -> List[str]:
+        """
+        Log output of a run between two timestamps
+        """
+        rows = self.query('logs', ALL, start, end, [run]).get(run)
+        if rows is None:
+            return []
+
+        with open(os.path.join(self.path, run, 'logs.txt'), 'rb') as f:
+            texts = []
+            for offset, length in zip(rows['offset'], rows['length']):
+                f.seek(offset)
+                texts.append(f.read(length).decode())
+        return texts
+
+    @contextmanager
+    def column(self, folder: str, partition: str, name: str, typecode: str) -> Iterator[Optional[memoryview]]:
+        """
+        Memory mapped column, None if it has no rows. The mapping is closed on leaving the with block,
+        so only copies (tolist) of the view may be kept.
+        """
+        file = os.path.join(folder, f'{partition}.{name}')
+        if not os.path.exists(file) or os.path.getsize(file) == 0:
+            yield None
+            return
+
+        with open(file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            with memoryview(mapped) as raw, raw.cast(typecode) as values:
+                yield values
+
+
+if __name__ == '__main__':
+    # python result_store.py <store> pnl PICNIC_BASKET 200000 400000
+    store_path, table, partition, start, end = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+    store = ResultStore(store_path)
+
+    for run, rows in store.query(table, partition, start, end).items():
+        columns = [name for name, _ in TABLES[table]]
+        print(f'{run}: {len(rows["timestamp"])} rows, {rows["timestamp"][0]} to {rows["timestamp"][-1]}')
+        for name in columns:
+            print(f'  {name}: first {rows[name][0]}, last {rows[name][-1]}, min {min(rows[name])}, max {max(rows[name])}')
@@ -0,0 +1,215 @@
+import time
+from typing import Dict, List, Optional
+from datamodel import Order, Symbol, Product, Position, TradingState
+
+# Products that are traded against each other. Within a group, a long position in one product and a short one
+# in another mostly offset, so the group's exposure is the sum of signed notionals rather than of absolute ones.
+GROUPS = {
+    'PINA_COLADAS/COCONUTS': ['PINA_COLADAS', 'COCONUTS'],
+    'DIVING_GEAR/DOLPHIN_SIGHTINGS': ['DIVING_GEAR', 'DOLPHIN_SIGHTINGS'],
+    'PICNIC_BASKET': ['PICNIC_BASKET', 'BAGUETTE', 'DIP', 'UKULELE'],
+}
+
+
+class RiskEngine:
+    """
+    Mark-to-market PnL, drawdown and exposure of every product and of the whole portfolio, updated from
+    state.own_trades (the fills since the previous state, as on the exchange) and the mid prices, in O(products)
+    per tick. Also checks the outgoing orders against the thresholds, after the OrderSizer.
+
+    max_drawdown: once the portfolio falls this far below its peak PnL, the kill switch latches and from then
+                  on only orders that reduce a position get through
+    max_product_drawdown: same for a single product, blocking only the orders that would grow its position
+    max_gross_exposure: cap on the sum of |position * mid| over all products, new position is shrunk to fit
+    max_group_exposure: cap on |sum of position * mid| within each group of GROUPS
+
+    Limits left at None are not checked.
+    """
+    def __init__(self, max_drawdown: Optional[float] = None, max_product_drawdown: Optional[float] = None,
+                 max_gross_exposure: Optional[float] = None, max_group_exposure: Optional[float] = None,
+                 groups: Dict[str, List[Product]] = GROUPS) -> None:
+        self.max_drawdown = max_drawdown
+        self.max_product_drawdown = max_product_drawdown
+        self.max_gross_exposure = max_gross_exposure
+        self.max_group_exposure = max_group_exposure
+        self.group_of = {product: group for group, products in groups.items() for product in products}
+
+        self.position: Dict[Product, Position] = {}
+        self.cash: Dict[Product, float] = {}
+        self.mids: Dict[Product, float] = {}
+        self.pnl: Dict[Product, float] = {}
+        self.peak: Dict[Product, float] = {}
+        self.drawdown: Dict[Product, float] = {}
+
+        self.total_pnl = 0.0
+        self.total_peak = 0.0
+        self.total_drawdown = 0.0
+        self.max_total_drawdown = 0.0
+        self.gross_exposure = 0.0
+        self.max_seen_gross_exposure = 0.0
+        self.group_exposure: Dict[str, float] = {}
+
+        # Timestamp at which the kill switch latched
+        self.killed_at: Optional[int] = None
+        # Units removed from orders, per symbol
+        self.blocked: Dict[Symbol, int] = {}
+        # Time spent in update and check, per tick
+        self.overhead: List[float] = []
+
+    def update(self, state: TradingState) -> None:
+        """
+        Books the new fills and marks every product at its current mid price
+        """
+        start = time.perf_counter()
+
+        for symbol, trades in state.own_trades.items():
+            for trade in trades:
+                quantity = trade.quantity if trade.buyer == 'SUBMISSION' else -trade.quantity
+                self.cash[symbol] = self.cash.get(symbol, 0.0) - trade.price * quantity
+
+        # The exchange's position is the reference, the fills only move the cash
+        self.position = dict(state.position)
+
+        for product, order_depth in state.order_depths.items():
+            if order_depth.buy_orders and order_depth.sell_orders:
+                self.mids[product] = (max(order_depth.buy_orders) + min(order_depth.sell_orders)) / 2
+
+        total = 0.0
+        gross = 0.0
+        groups: Dict[str, float] = {}
+        for product in self.cash.keys() | self.position.keys():
+            mid = self.mids.get(product, 0.0)
+            notional = self.position.get(product, 0) * mid
+            pnl = self.cash.get(product, 0.0) + notional
+            self.pnl[product] = pnl
+            self.peak[product] = max(self.peak.get(product, 0.0), pnl)
+            self.drawdown[product] = self.peak[product] - pnl
+
+            total += pnl
+            gross += abs(notional)
+            group = self.group_of.get(product)
+            if group is not None:
+                groups[group] = groups.get(group, 0.0) + notional
+
+        self.total_pnl = total
+        self.total_peak = max(self.total_peak, total)
+        self.total_drawdown = self.total_peak - total
+        self.max_total_drawdown = max(self.max_total_drawdown, self.total_drawdown)
+        self.gross_exposure = gross
+        self.max_seen_gross_exposure = max(self.max_seen_gross_exposure, gross)
+        self.group_exposure = groups
+
+        if self.killed_at is None and self.max_drawdown is not None and self.total_drawdown > self.max_drawdown:
+            self.killed_at = state.timestamp
+
+        self.overhead.append(time.perf_counter() - start)
+
+    def check(self, orders: Dict[Symbol, List[Order]]) -> Dict[Symbol, List[Order]]:
+        """
+        Parameters:
+        orders: Dict[Symbol, List[Order]]
+            Orders that already went through the OrderSizer
+
+        Returns:
+        Dict[Symbol, List[Order]] with the orders that would grow a position removed or shrunk as far as the
+        thresholds require. Orders that reduce a position always get through.
+        """
+        start = time.perf_counter()
+
+        # Room left for new exposure, used up product after product
+        gross_room = None if self.max_gross_exposure is None else max(0.0, self.max_gross_exposure - self.gross_exposure)
+        group_exposure = dict(self.group_exposure)
+        # Units left that buy back a short and that sell a long, per symbol, used up across all keys of orders
+        # since orders under another key (e.g. DIVING_GEAR under PICNIC_BASKET) move the same position
+        buy_reduce: Dict[Symbol, int] = {}
+        sell_reduce: Dict[Symbol, int] = {}
+
+        result: Dict[Symbol, List[Order]] = {}
+        for product, product_orders in orders.items():
+            by_side: Dict[tuple, List[Order]] = {}
+            for order in product_orders:
+                by_side.setdefault((order.symbol, order.quantity > 0), []).append(order)
+
+            accepted: List[Order] = []
+            for (symbol, buying), side_orders in by_side.items():
+                if symbol not in buy_reduce:
+                    position = self.position.get(symbol, 0)
+                    buy_reduce[symbol] = max(0, -position)
+                    sell_reduce[symbol] = max(0, position)
+                reduce = buy_reduce if buying else sell_reduce
+
+                total = sum(abs(order.quantity) for order in side_orders)
+                # Buying first covers a short position and selling first sells a long one
+                reducing = min(total, reduce[symbol])
+                reduce[symbol] -= reducing
+                opening = total - reducing
+                allowed = self.allowed_opening(symbol, buying, opening, group_exposure, gross_room)
+
+                if gross_room is not None:
+                    gross_room -= allowed * self.mids.get(symbol, 0.0)
+                group = self.group_of.get(symbol)
+                if group is not None:
+                    group_exposure[group] = group_exposure.get(group, 0.0) + (allowed if buying else -allowed) * self.mids.get(symbol, 0.0)
+
+                if allowed < opening:
+                    self.blocked[symbol] = self.blocked.get(symbol, 0) + opening - allowed
+                accepted.extend(trim(side_orders, reducing + allowed))
+
+            result[product] = accepted
+
+        # Counted with the update of the same tick
+        if self.overhead:
+            self.overhead[-1] += time.perf_counter() - start
+        return result
+
+    def allowed_opening(self, symbol: Symbol, buying: bool, opening: int, group_exposure: Dict[str, float], gross_room: Optional[float]) -> int:
+        """
+        How many of the `opening` units that grow the position of the symbol can be sent
+        """
+        if opening == 0 or self.killed_at is not None:
+            return 0
+        if self.max_product_drawdown is not None and self.drawdown.get(symbol, 0.0) > self.max_product_drawdown:
+            return 0
+
+        mid = self.mids.get(symbol, 0.0)
+        if mid <= 0:
+            return opening
+
+        allowed = opening
+        if gross_room is not None:
+            allowed = min(allowed, int(gross_room // mid))
+
+        group = self.group_of.get(symbol)
+        if group is not None and self.max_group_exposure is not None:
+            exposure = group_exposure.get(group, 0.0)
+            # Units that can be added on this side before |group exposure| passes the cap
+            room = self.max_group_exposure - exposure if buying else self.max_group_exposure + exposure
+            allowed = min(allowed, max(0, int(room // mid)))
+
+        return max(0, allowed)
+
+    def report(self) -> List[str]:
+        lines = [f'risk: pnl {self.total_pnl:.1f}, max drawdown {self.max_total_drawdown:.1f}, '
+                 f'peak gross exposure {self.max_seen_gross_exposure:.0f}'
+                 + (f', killed at {self.killed_at}' if self.killed_at is not None else '')]
+        for symbol, units in sorted(self.blocked.items()):
+            lines.append(f'{symbol:<15} risk blocked {units} units')
+        if self.overhead:
+            overhead = sorted(self.overhead)
+            lines.append(f'risk overhead: mean {sum(overhead) / len(overhead) * 1e6:.1f}us, '
+                         f'p99 {overhead[int(0.99 * (len(overhead) - 1))] * 1e6:.1f}us per tick')
+        return lines
+
+
+def trim(orders: List[Order], total: int) -> List[Order]:
+    """
+    Keeps the orders in the given order until `total` units are reached, cutting the last one short
+    """
+    kept: List[Order] = []
+    for order in orders:
+        if total <= 0:
+            break
+        quantity = min(abs(order.quantity), total)
+        total -= quantity
+        kept.append(order if quantity == abs(order.quantity) else Order(order.symbol, order.price, quantity if order.quantity > 0 else -quantity))
+    return kept
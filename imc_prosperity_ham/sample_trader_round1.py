@@ -1,5 +1,6 @@
 from typing import Dict, List
 from datamodel import OrderDepth, TradingState, Order, Trade
+from sizing import OrderSizer
 
 PEARLS = 'PEARLS'
 BANANAS = 'BANANAS'
@@ -9,6 +10,11 @@ MAX_PEARL = 20
 MAX_COCONUT = 600
 MAX_PINACOLADA = 300
 
+POSITION_LIMITS = {
+    PEARLS: MAX_PEARL,
+    BANANAS: MAX_BANANA,
+}
+
 class Trader:
     PEARLS_PRICE = 10000
     BANANA_PRICE = 5000
@@ -22,6 +28,10 @@ class Trader:
     banana_sma_big = 0
     banana_sma_little = 0
 
+    def __init__(self) -> None:
+        # Rounds and clips every outgoing order against the position limits
+        self.sizer = OrderSizer(POSITION_LIMITS)
+
     def run(self, state: TradingState) -> Dict[str, List[Order]]:
         """
         Only method required. It takes all buy and sell orders for all symbols as an input,
@@ -55,7 +65,7 @@ class Trader:
 
                 result[BANANAS] = orders
 
-        return result
+        return self.sizer.clip(result, state.position)
     
     def process_pearls(self, order_depth: OrderDepth) -> List[Order]:
         # Initialize the list of Orders to be sent as an empty list
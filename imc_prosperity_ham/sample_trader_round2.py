@@ -1,6 +1,7 @@
 import json
 from typing import Any, Dict, List, Tuple
 from datamodel import OrderDepth, TradingState, Order, Trade, ProsperityEncoder, Symbol
+from sizing import OrderSizer
 
 PEARLS = 'PEARLS'
 BANANAS = 'BANANAS'
@@ -12,6 +13,13 @@ MAX_PEARL = 20
 MAX_COCONUT = 600
 MAX_PINACOLADA = 300
 
+POSITION_LIMITS = {
+    PEARLS: MAX_PEARL,
+    BANANAS: MAX_BANANA,
+    COCONUTS: MAX_COCONUT,
+    PINA_COLADAS: MAX_PINACOLADA,
+}
+
 class Logger:
     def __init__(self) -> None:
         self.logs = ""
@@ -46,6 +54,10 @@ class Trader:
     last_pina_price = PINACOLADA_PRICE
     last_coco_price = COCONUT_PRICE
 
+    def __init__(self) -> None:
+        # Rounds and clips every outgoing order against the position limits
+        self.sizer = OrderSizer(POSITION_LIMITS)
+
     def run(self, state: TradingState) -> Dict[str, List[Order]]:
         """
         Only method required. It takes all buy and sell orders for all symbols as an input,
@@ -87,6 +99,8 @@ class Trader:
         result[PINA_COLADAS] = pina_orders
         result[COCONUTS] = coco_orders
 
+        result = self.sizer.clip(result, state.position)
+
         logger.print(result)
 
         logger.flush(state, orders)
@@ -1,6 +1,7 @@
 import json
 from typing import Any, Dict, List, Tuple
 from datamodel import OrderDepth, TradingState, Order, Trade, ProsperityEncoder, Symbol
+from sizing import OrderSizer
 
 PEARLS = 'PEARLS'
 BANANAS = 'BANANAS'
@@ -15,6 +16,14 @@ MAX_PINACOLADA = 300
 MAX_DIVING_GEAR = 50
 MAX_BERRIES = 250
 
+POSITION_LIMITS = {
+    PEARLS: MAX_PEARL,
+    BANANAS: MAX_BANANA,
+    COCONUTS: MAX_COCONUT,
+    PINA_COLADAS: MAX_PINACOLADA,
+    DIVING_GEAR: MAX_DIVING_GEAR,
+}
+
 class Logger:
     def __init__(self) -> None:
         self.logs = ""
@@ -51,6 +60,10 @@ class Trader:
     last_pina_price = PINACOLADA_PRICE
     last_coco_price = COCONUT_PRICE
 
+    def __init__(self) -> None:
+        # Rounds and clips every outgoing order against the position limits
+        self.sizer = OrderSizer(POSITION_LIMITS)
+
     def run(self, state: TradingState) -> Dict[str, List[Order]]:
         """
         Only method required. It takes all buy and sell orders for all symbols as an input,
@@ -92,6 +105,8 @@ class Trader:
         result[PINA_COLADAS] = pina_orders
         result[COCONUTS] = coco_orders
 
+        result = self.sizer.clip(result, state.position)
+
         logger.print(result)
 
         logger.flush(state, orders)
@@ -1,6 +1,11 @@
 import json
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 from datamodel import OrderDepth, TradingState, Order, Trade, ProsperityEncoder, Symbol
+from sizing import OrderSizer
+from quoting import Quoter
+from risk import RiskEngine
+from regime import RegimeDetector, BERRIES_PARAMETERS, DOLPHIN_JUMP_PARAMETERS
+from precomputed import TABLES
 
 PEARLS = 'PEARLS'
 BANANAS = 'BANANAS'
@@ -27,6 +32,23 @@ MAX_DIP = 300
 MAX_UKULELE = 70
 MAX_PICNIC_BASKET = 70
 
+POSITION_LIMITS = {
+    PEARLS: MAX_PEARL,
+    BANANAS: MAX_BANANA,
+    COCONUTS: MAX_COCONUT,
+    PINA_COLADAS: MAX_PINACOLADA,
+    DIVING_GEAR: MAX_DIVING_GEAR,
+    BERRIES: MAX_BERRIES,
+    BAGUETTE: MAX_BAGUETTE,
+    DIP: MAX_DIP,
+    UKULELE: MAX_UKULELE,
+    PICNIC_BASKET: MAX_PICNIC_BASKET,
+}
+
+# Stop opening new positions after a 50000 drawdown, only round 2 day 0 got there (-41631 without, -39385 with it).
+# A max_group_exposure of 2000000 helped days 0 and 1 of round 2 but halved day -1, so it is left off.
+RISK_LIMITS = dict(max_drawdown=50000)
+
 class Logger:
     def __init__(self) -> None:
         self.logs = ""
@@ -52,17 +74,19 @@ class Trader:
     COCONUT_PRICE = 8000
     DOLPHIN_PRICE = 3000
     DIVING_GEAR_PRICE = 100000
-    BAGUETTE_PRICE = 12000
-    DIP_PRICE = 7000
-    UKULELE_PRICE = 20000
-    PICNIC_BASKET_PRICE = 74000
+    # Volume weighted prices over the recorded days (python startup.py build), decoded once at import
+    BAGUETTE_PRICE = TABLES['fair_values'][BAGUETTE]
+    DIP_PRICE = TABLES['fair_values'][DIP]
+    UKULELE_PRICE = TABLES['fair_values'][UKULELE]
+    PICNIC_BASKET_PRICE = TABLES['fair_values'][PICNIC_BASKET]
+
+    # The dolphin jump detector is not validated on observation data yet (see regime.DOLPHIN_JUMP_PARAMETERS),
+    # until then its jumps are only logged and no DIVING_GEAR is traded on them
+    TRADE_DOLPHIN_JUMPS = False
 
     BANANA_SMA_BIG_SIZE = 200
     BANANA_SMA_LITTLE_SIZE = 50
 
-    TOTAL_TIME = 1000
-    current_time = 0
-
     banana_prices = [0]
     banana_sma_big = 0
     banana_sma_little = 0
@@ -70,6 +94,17 @@ class Trader:
     last_pina_price = PINACOLADA_PRICE
     last_coco_price = COCONUT_PRICE
 
+    def __init__(self) -> None:
+        # Rounds and clips every outgoing order against the position limits
+        self.sizer = OrderSizer(POSITION_LIMITS)
+        # Portfolio PnL, drawdown and exposure, and the last check on the orders
+        self.risk = RiskEngine(**RISK_LIMITS)
+        # Passive PEARLS quotes around the fair value, skewed by our position
+        self.pearls_quoter = Quoter(PEARLS, self.PEARLS_PRICE, MAX_PEARL)
+        # Change detectors for the berries seasonal peak and jumps in dolphin sightings
+        self.berries_regime = RegimeDetector(**BERRIES_PARAMETERS)
+        self.dolphin_jumps = RegimeDetector(**DOLPHIN_JUMP_PARAMETERS)
+
     def run(self, state: TradingState) -> Dict[str, List[Order]]:
         """
         Only method required. It takes all buy and sell orders for all symbols as an input,
@@ -80,59 +115,55 @@ class Trader:
         # logger.print(state.own_trades)
         logger.print(state.position)
 
-        # Iterate over all the keys (the available products) contained in the order depths
-        for product in state.order_depths.keys():
-
-            # Check if the current product is the PEARLS product, only then run the order logic
-            if product == PEARLS:
-
-                # Retrieve the Order Depth containing all the market BUY and SELL orders for PEARLS
-                order_depth: OrderDepth = state.order_depths[product]
+        order_depths = state.order_depths
+        self.risk.update(state)
 
-                # Add all the above orders to the result dict
-                result[PEARLS] = self.process_pearls(order_depth)
-                # Return the dict of orders
-                # These possibly contain buy or sell orders for PEARLS
-                # Depending on the logic above
+        if PEARLS in order_depths:
+            # Not cached: the quotes use up the whole position room, so cached orders next to any
+            # taking order never fit in the limits again and the cache would almost never hit
+            result[PEARLS] = self.process_pearls(order_depths[PEARLS], state.position.get(PEARLS, 0))
 
-            if product == BANANAS:
-                order_depth: OrderDepth = state.order_depths[product]
-                market_trades: List[Trade] = state.market_trades.get(product, [])
-
-                orders = self.process_bananas(order_depth, market_trades)
-
-                result[BANANAS] = orders
+        if BANANAS in order_depths:
+            # The SMA is updated on every tick, so bananas always run
+            market_trades: List[Trade] = state.market_trades.get(BANANAS, [])
+            result[BANANAS] = self.process_bananas(order_depths[BANANAS], market_trades)
 
         # Process coconuts and pinacoladas together
-        pina_order_depth: OrderDepth = state.order_depths[PINA_COLADAS]
-        coco_order_depth: OrderDepth = state.order_depths[COCONUTS]
+        if PINA_COLADAS in order_depths and COCONUTS in order_depths:
+            pina_order_depth: OrderDepth = order_depths[PINA_COLADAS]
+            coco_order_depth: OrderDepth = order_depths[COCONUTS]
 
-        pina_orders, coco_orders = self.process_coconuts_and_pinacoladas(pina_order_depth, coco_order_depth)
-        result[PINA_COLADAS] = pina_orders
-        result[COCONUTS] = coco_orders
+            result[PINA_COLADAS], result[COCONUTS] = self.process_coconuts_and_pinacoladas(pina_order_depth, coco_order_depth)
 
-        # Process dolphin sightings and diving gear
-        dolphin_order_depth: OrderDepth = state.order_depths[DOLPHIN_SIGHTINGS]
-        diving_order_depth: OrderDepth = state.order_depths[DIVING_GEAR]
-        result[DIVING_GEAR] = self.process_diving_gear(diving_order_depth, dolphin_order_depth)
+        # Process diving gear, the jump detector is updated on every tick so it always runs.
+        # Dolphin sightings are an observation, not a product with an order book.
+        if DIVING_GEAR in order_depths:
+            diving_order_depth: OrderDepth = order_depths[DIVING_GEAR]
+            result[DIVING_GEAR] = self.process_diving_gear(diving_order_depth, state.observations.get(DOLPHIN_SIGHTINGS), state.timestamp)
 
-        # Process berries
-        result[BERRIES] = self.process_berries(state.order_depths[BERRIES])
+        # Process berries, the peak detector is updated on every tick so they always run
+        if BERRIES in order_depths:
+            result[BERRIES] = self.process_berries(order_depths[BERRIES], state.market_trades.get(BERRIES, []), state.timestamp)
 
         # Process picnic baskets
-        baguette_order_depth: OrderDepth = state.order_depths[BAGUETTE]
-        dip_order_depth: OrderDepth = state.order_depths[DIP]
-        ukulele_order_depth: OrderDepth = state.order_depths[UKULELE]
-        picnic_order_depth: OrderDepth = state.order_depths[PICNIC_BASKET]
-        result[PICNIC_BASKET] = self.process_picnic_baskets(baguette_order_depth, dip_order_depth, ukulele_order_depth, picnic_order_depth)
+        if all(product in order_depths for product in (BAGUETTE, DIP, UKULELE, PICNIC_BASKET)):
+            baguette_order_depth: OrderDepth = order_depths[BAGUETTE]
+            dip_order_depth: OrderDepth = order_depths[DIP]
+            ukulele_order_depth: OrderDepth = order_depths[UKULELE]
+            picnic_order_depth: OrderDepth = order_depths[PICNIC_BASKET]
+
+            result[PICNIC_BASKET] = self.process_picnic_baskets(baguette_order_depth, dip_order_depth, ukulele_order_depth, picnic_order_depth)
+
+        result = self.sizer.clip(result, state.position)
+        result = self.risk.check(result)
 
         logger.print(result)
 
-        logger.flush(state, orders)
+        logger.flush(state, result)
 
         return result
-    
-    def process_pearls(self, order_depth: OrderDepth) -> List[Order]:
+
+    def process_pearls(self, order_depth: OrderDepth, position: int) -> List[Order]:
         # Initialize the list of Orders to be sent as an empty list
         orders: list[Order] = []
 
@@ -153,6 +184,9 @@ class Trader:
                 logger.print("SELL", str(best_bid_volume) + "x PEARL", bid)
                 orders.append(Order(PEARLS, bid, -best_bid_volume))
 
+        # Post passive quotes with whatever room is left, the sizer clips them behind the orders above
+        orders += self.pearls_quoter.quote(position)
+
         return orders
     
     def process_bananas(self, order_depth: OrderDepth, market_trades: List[Trade]) -> List[Order]:
@@ -229,56 +263,70 @@ class Trader:
 
         return pina_orders, coco_orders
     
-    def process_diving_gear(self, diving_gear_od: OrderDepth, dolphins_od: OrderDepth):
+    def process_diving_gear(self, diving_gear_od: OrderDepth, dolphin_sightings: Optional[int], timestamp: int):
         '''
-        Very simple pair trading algorithm. Buy the cheaper product, sell the more expensive one.
+        Follow jumps in dolphin sightings: buy diving gear after sightings jump up, sell after they jump down.
+        Only trades with TRADE_DOLPHIN_JUMPS set, otherwise the jumps are logged and no orders are sent.
 
         Parameters:
         diving_gear_od: OrderDepth
             Order depth for Diving Gear
-        dolphins_od: OrderDepth
-            Order depth for Dolphin Sightings
+        dolphin_sightings: Optional[int]
+            Dolphin sightings observed this tick, None when the state has no observation
+        timestamp: int
+            Timestamp of the state, the jump detector is keyed on it
 
         Returns:
         List[Order] for Diving Gear
         '''
         diving_orders: list[Order] = []
 
-        standardized_diving_price = (max(diving_gear_od.buy_orders.keys()) + min(diving_gear_od.sell_orders.keys())) / 2 / self.DIVING_GEAR_PRICE
-        standardized_dolphin_price = (max(dolphins_od.buy_orders.keys()) + min(dolphins_od.sell_orders.keys())) / 2 / self.DOLPHIN_PRICE
+        if dolphin_sightings is not None:
+            if self.dolphin_jumps.update(timestamp, dolphin_sightings):
+                logger.print(f'Dolphin sightings jump {"up" if self.dolphin_jumps.regime > 0 else "down"} at {timestamp}')
 
-        logger.print(f'Diving Price: {standardized_diving_price:.4f}, Dolphin Price: {standardized_dolphin_price:.4f}, \
-              {"Dolphin cheaper" if standardized_diving_price > standardized_dolphin_price else "Diving cheaper"}')
-        
-        trade_factor = 1/30
+        if not self.TRADE_DOLPHIN_JUMPS:
+            return diving_orders
 
-        if standardized_diving_price > standardized_dolphin_price:
-            if len(diving_gear_od.sell_orders):
-                diving_orders.append(self.sell_highest_bid(DIVING_GEAR, diving_gear_od.sell_orders, quantity=trade_factor*MAX_DIVING_GEAR))
-        else:
-            if len(diving_gear_od.buy_orders):
-                diving_orders.append(self.buy_lowest_ask(DIVING_GEAR, diving_gear_od.buy_orders, quantity=trade_factor*MAX_DIVING_GEAR))
+        # Keep trading in the direction of the last jump, the sizer stops us at the position limit
+        if self.dolphin_jumps.regime > 0 and len(diving_gear_od.sell_orders):
+            diving_orders.append(self.buy_lowest_ask(DIVING_GEAR, diving_gear_od.sell_orders, quantity=MAX_DIVING_GEAR))
+        elif self.dolphin_jumps.regime < 0 and len(diving_gear_od.buy_orders):
+            diving_orders.append(self.sell_highest_bid(DIVING_GEAR, diving_gear_od.buy_orders, quantity=MAX_DIVING_GEAR))
 
         return diving_orders
     
-    def process_berries(self, berries_od: OrderDepth):
+    def process_berries(self, berries_od: OrderDepth, market_trades: List[Trade], timestamp: int):
         '''
-        Buy up berries in the first part of round, sell at mid-point
+        Buy up berries while their price rises, sell from the moment the seasonal peak is detected
 
         Parameters:
         berries_od : OrderDepth
             Order depth for berries
+        market_trades: List[Trade]
+            Market trades of berries since the last tick, the peak detector was tuned on their prices
+        timestamp: int
+            Timestamp of the state, the peak detector is keyed on it
 
         Returns:
         List[Order] for berries
         '''
-        self.current_time += 1
-
         berry_orders = []
 
-        if self.current_time < self.TOTAL_TIME / 3 * 8:
-            berry_orders.append(self.buy_lowest_ask(BERRIES, berries_od.sell_orders))
-        elif self.current_time > self.TOTAL_TIME / 3 * 8:
+        if len(market_trades):
+            total = 0
+            quantity = 0
+
+            for trade in market_trades:
+                total += trade.price * trade.quantity
+                quantity += trade.quantity
+
+            self.berries_regime.update(timestamp, total / quantity)
+
+        if self.berries_regime.peaked_at is None:
+            if len(berries_od.sell_orders):
+                berry_orders.append(self.buy_lowest_ask(BERRIES, berries_od.sell_orders))
+        elif len(berries_od.buy_orders):
             # sell when reaching top and always after that
             berry_orders.append(self.sell_highest_bid(BERRIES, berries_od.buy_orders))
 
@@ -0,0 +1,71 @@
+from typing import Dict, List
+from datamodel import Order, Symbol, Product, Position
+
+
+class OrderSizer:
+    """
+    Last step before orders leave the trader. The exchange rejects every order of a product
+    if the orders could take the position past its limit, or if a quantity is not an integer,
+    so every order is rounded to an integer and clipped against the position plus the orders
+    already accepted on the same side.
+    """
+    def __init__(self, limits: Dict[Symbol, int]) -> None:
+        self.limits = limits
+
+        # Units removed by clipping, orders dropped entirely and orders whose quantity had to be rounded
+        self.clipped: Dict[Symbol, int] = {}
+        self.dropped: Dict[Symbol, int] = {}
+        self.rounded: Dict[Symbol, int] = {}
+
+    def clip(self, orders: Dict[Symbol, List[Order]], position: Dict[Product, Position]) -> Dict[Symbol, List[Order]]:
+        """
+        Parameters:
+        orders: Dict[Symbol, List[Order]]
+            Orders produced by the strategies
+        position: Dict[Product, Position]
+            Current position, i.e. state.position
+
+        Returns:
+        Dict[Symbol, List[Order]] with only orders the exchange will accept
+        """
+        # Room left to buy and to sell per symbol, reduced as orders get accepted
+        buy_room: Dict[Symbol, int] = {}
+        sell_room: Dict[Symbol, int] = {}
+
+        result: Dict[Symbol, List[Order]] = {}
+
+        for product, product_orders in orders.items():
+            accepted: List[Order] = []
+
+            for order in product_orders:
+                symbol = order.symbol
+                quantity = round(order.quantity)
+                if quantity != order.quantity:
+                    self.rounded[symbol] = self.rounded.get(symbol, 0) + 1
+
+                limit = self.limits.get(symbol)
+                if limit is not None:
+                    if symbol not in buy_room:
+                        buy_room[symbol] = limit - position.get(symbol, 0)
+                        sell_room[symbol] = limit + position.get(symbol, 0)
+
+                    if quantity > 0:
+                        allowed = max(0, min(quantity, buy_room[symbol]))
+                        buy_room[symbol] -= allowed
+                    else:
+                        allowed = -max(0, min(-quantity, sell_room[symbol]))
+                        sell_room[symbol] += allowed
+
+                    if allowed != quantity:
+                        self.clipped[symbol] = self.clipped.get(symbol, 0) + abs(quantity - allowed)
+                    quantity = allowed
+
+                if quantity == 0:
+                    self.dropped[symbol] = self.dropped.get(symbol, 0) + 1
+                    continue
+
+                accepted.append(Order(symbol, order.price, quantity))
+
+            result[product] = accepted
+
+        return result
@@ -0,0 +1,182 @@
+import csv
+import glob
+import os
+import subprocess
+import sys
+from typing import Dict, Iterator, List, Tuple
+from lazy import pack_tables
+from tournament import DEFAULT_TRADERS, HERE
+
+# Pairs the traders hedge against each other, as (product, hedge)
+HEDGE_PAIRS = [('PINA_COLADAS', 'COCONUTS'), ('DIVING_GEAR', 'DOLPHIN_SIGHTINGS'), ('PICNIC_BASKET', 'BAGUETTE'), ('PICNIC_BASKET', 'DIP'), ('PICNIC_BASKET', 'UKULELE')]
+
+
+def import_profile(module_name: str, top: int = 8) -> Tuple[int, List[Tuple[int, str]]]:
+    """
+    Imports the module in a fresh interpreter with -X importtime.
+
+    Returns:
+    (total microseconds for the module, [(self microseconds, module)] of the `top` slowest imports it pulled in)
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'], cwd=HERE, capture_output=True, text=True)
+
+    imports = []
+    total = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((int(own), name.strip()))
+        if name.strip() == module_name:
+            total = int(cumulative)
+
+    return total, sorted(imports, reverse=True)[:top]
+
+
+# Run in a fresh interpreter: import the trader, create it, then time run() on the first ticks of a day.
+# The last tick is timed once more right after evicting the CPU caches, which shows how much of the
+# first run() is cold caches rather than anything the trader loads or builds on its first call.
+FIRST_RUN_SCRIPT = '''
+import io, sys, time
+from contextlib import redirect_stdout
+start = time.perf_counter()
+import {module_name}
+imported = time.perf_counter()
+trader = {module_name}.Trader()
+created = time.perf_counter()
+from fake_market import FakeMarket, day_files, read_prices
+books = read_prices(day_files({round}, {day})[0])
+market = FakeMarket(trader)
+
+def timed_run(state):
+    tick = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        result = trader.run(state)
+    return time.perf_counter() - tick, result
+
+latencies = []
+for timestamp in sorted(books)[:200]:
+    state = market.make_state(timestamp, books[timestamp], {{}})
+    latency, result = timed_run(state)
+    latencies.append(latency)
+    market.settle(timestamp, result, books[timestamp])
+
+# 64MB is larger than any CPU cache here
+junk = bytearray(64 * 2 ** 20)
+sum(junk[::64])
+cold, _ = timed_run(state)
+
+later = sorted(latencies[1:])
+print(imported - start, created - imported, latencies[0], later[len(later) // 2], cold)
+'''
+
+
+def first_run_profile(module_name: str, round: int, day: int) -> Tuple[float, float, float, float, float]:
+    """
+    Returns (import seconds, Trader() seconds, first run() seconds, median of the next run() calls,
+    one more run() after evicting the CPU caches) in a fresh interpreter
+    """
+    script = FIRST_RUN_SCRIPT.format(module_name=module_name, round=round, day=day)
+    result = subprocess.run([sys.executable, '-c', script], cwd=HERE, capture_output=True, text=True, check=True)
+    return tuple(float(value) for value in result.stdout.split())
+
+
+
+def distinct_trades(pattern: str) -> Iterator[Dict[str, str]]:
+    """
+    Rows of the trades files matching the pattern (under data/), skipping a symbol's rows in a file when an
+    earlier file already had exactly the same ones: later rounds repeat the tapes of earlier days, which
+    would otherwise count twice.
+    """
+    seen = set()
+    for file in sorted(glob.glob(os.path.join(HERE, 'data', pattern))):
+        rows: Dict[str, List[Dict[str, str]]] = {}
+        with open(file, newline='') as f:
+            for row in csv.DictReader(f, delimiter=';'):
+                rows.setdefault(row['symbol'], []).append(row)
+
+        for symbol, symbol_rows in rows.items():
+            tape = (symbol, tuple((row['timestamp'], row['price'], row['quantity']) for row in symbol_rows))
+            if tape not in seen:
+                seen.add(tape)
+                yield from symbol_rows
+
+
+def build_tables() -> Dict:
+    """
+    Tables precomputed from the recorded trades:
+    fair_values: volume weighted price of every product over all days
+    hedge_ratios: "PRODUCT/HEDGE" -> fair value of the product divided by the fair value of its hedge
+    counterparties: name -> product -> [bought, sold, average buy price, average sell price]
+    """
+    totals: Dict[str, List[float]] = {}
+    counterparties: Dict[str, Dict[str, List[float]]] = {}
+
+    for row in distinct_trades(os.path.join('*', 'trades_*_nn.csv')):
+        total = totals.setdefault(row['symbol'], [0.0, 0])
+        total[0] += float(row['price']) * int(row['quantity'])
+        total[1] += int(row['quantity'])
+
+    for row in distinct_trades(os.path.join('*', 'trades_*_wn.csv')):
+        price, quantity = float(row['price']), int(row['quantity'])
+        for name, side in ((row['buyer'], 0), (row['seller'], 1)):
+            if not name:
+                continue
+            stats = counterparties.setdefault(name, {}).setdefault(row['symbol'], [0, 0, 0.0, 0.0])
+            stats[side] += quantity
+            stats[side + 2] += price * quantity
+
+    fair_values = {symbol: round(total / quantity, 2) for symbol, (total, quantity) in totals.items() if quantity}
+
+    for products in counterparties.values():
+        for stats in products.values():
+            stats[2] = round(stats[2] / stats[0], 2) if stats[0] else 0.0
+            stats[3] = round(stats[3] / stats[1], 2) if stats[1] else 0.0
+
+    hedge_ratios = {
+        f'{product}/{hedge}': round(fair_values[product] / fair_values[hedge], 6)
+        for product, hedge in HEDGE_PAIRS if product in fair_values and hedge in fair_values
+    }
+
+    return {'fair_values': fair_values, 'hedge_ratios': hedge_ratios, 'counterparties': counterparties}
+
+
+PRECOMPUTED_TEMPLATE = '''# Generated by `python startup.py build`, do not edit by hand.
+# Precomputed fair values, hedge ratios and counterparty stats, see startup.build_tables.
+# Decoded once at import, so reading them never costs anything inside run().
+from lazy import unpack_tables
+
+BLOB = (
+{lines}
+)
+
+TABLES = unpack_tables(BLOB)
+'''
+
+
+def write_precomputed(tables: Dict, file: str = os.path.join(HERE, 'precomputed.py')) -> int:
+    blob = pack_tables(tables)
+    lines = '\n'.join(f"    '{blob[i:i + 100]}'" for i in range(0, len(blob), 100))
+    with open(file, 'w') as f:
+        f.write(PRECOMPUTED_TEMPLATE.format(lines=lines))
+    return len(blob)
+
+
+if __name__ == '__main__':
+    # python startup.py [trader modules...]   profile import time and first run() of each trader
+    # python startup.py build                 regenerate precomputed.py from the recorded data
+    if sys.argv[1:2] == ['build']:
+        print(f'precomputed.py: {write_precomputed(build_tables())} bytes of tables')
+        sys.exit()
+
+    for module_name in sys.argv[1:] or DEFAULT_TRADERS:
+        total, slowest = import_profile(module_name)
+        print(f'{module_name}: import {total / 1000:.1f}ms')
+        for own, name in slowest:
+            print(f'  {own / 1000:6.2f}ms  {name}')
+
+        # Every trader handles round 2, round 1 has no coconuts or pina coladas
+        imported, created, first, later, cold = first_run_profile(module_name, 2, 1)
+        print(f'  import {imported * 1e3:.1f}ms, Trader() {created * 1e6:.0f}us, first run {first * 1e6:.0f}us, '
+              f'later runs {later * 1e6:.0f}us, later run with cold caches {cold * 1e6:.0f}us')
@@ -0,0 +1,33 @@
+from datamodel import Order
+from incremental import IncrementalCache, within_limits
+
+LIMITS = {'DIVING_GEAR': 50, 'PICNIC_BASKET': 70}
+
+
+def test_limits_per_order_symbol():
+    # Basket orders on DIVING_GEAR are checked against the DIVING_GEAR limit, not the PICNIC_BASKET one
+    assert not within_limits({'PICNIC_BASKET': [Order('DIVING_GEAR', 99000, 60)]}, {}, LIMITS)
+    assert within_limits({'PICNIC_BASKET': [Order('DIVING_GEAR', 99000, 50)]}, {}, LIMITS)
+
+
+def test_limits_net_across_keys():
+    orders = {'PICNIC_BASKET': [Order('DIVING_GEAR', 99000, 30)], 'DIVING_GEAR': [Order('DIVING_GEAR', 99000, 30)]}
+    assert not within_limits(orders, {}, LIMITS)
+    assert within_limits(orders, {'DIVING_GEAR': -10}, LIMITS)
+
+
+def test_limits_both_sides():
+    orders = {'DIVING_GEAR': [Order('DIVING_GEAR', 99000, 20), Order('DIVING_GEAR', 99002, -20)]}
+    assert within_limits(orders, {'DIVING_GEAR': 30}, LIMITS)
+    assert not within_limits(orders, {'DIVING_GEAR': 31}, LIMITS)
+    assert not within_limits(orders, {'DIVING_GEAR': -31}, LIMITS)
+
+
+def test_cache_rechecks_limits():
+    cache = IncrementalCache()
+    orders = {'PICNIC_BASKET': [Order('DIVING_GEAR', 99000, 30)]}
+    cache.store(('PICNIC_BASKET',), ('book',), orders)
+    assert cache.lookup(('PICNIC_BASKET',), ('book',), {'DIVING_GEAR': 0}, LIMITS) == orders
+    assert cache.lookup(('PICNIC_BASKET',), ('book',), {'DIVING_GEAR': 30}, LIMITS) is None
+    assert cache.lookup(('PICNIC_BASKET',), ('other book',), {}, LIMITS) is None
+    assert cache.skipped_fraction() == {'PICNIC_BASKET': 1 / 3}
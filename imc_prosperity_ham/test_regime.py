@@ -0,0 +1,37 @@
+from datamodel import OrderDepth, TradingState
+from regime import TICK, Cusum, RegimeDetector
+from sample_trader_round4 import DIVING_GEAR, DOLPHIN_SIGHTINGS, Trader
+
+
+def test_cusum_flags_a_jump_up():
+    cusum = Cusum(threshold=20, drift=2, alpha=0.2)
+    changes = [cusum.update(tick * TICK, 3000 if tick < 10 else 3015) for tick in range(20)]
+    assert changes.index(1) == 11 and -1 not in changes
+
+
+def test_repeated_timestamps_are_ignored():
+    detector = RegimeDetector(threshold=20, drift=2, alpha=0.2)
+    detector.update(0, 3000)
+    assert detector.update(0, 5000) == 0 and detector.update(-TICK, 5000) == 0
+
+
+def sightings_states(sightings):
+    order_depth = OrderDepth()
+    order_depth.buy_orders = {99000: 5}
+    order_depth.sell_orders = {99002: -5}
+    for tick, value in enumerate(sightings):
+        yield TradingState(tick * TICK, {}, {DIVING_GEAR: order_depth}, {}, {}, {}, {DOLPHIN_SIGHTINGS: value})
+
+
+def test_dolphin_jumps_only_logged_by_default(capsys):
+    trader = Trader()
+    orders = [trader.run(state).get(DIVING_GEAR) for state in sightings_states([3000] * 10 + [3015] * 10)]
+    assert trader.dolphin_jumps.regime == 1
+    assert not any(orders)
+
+
+def test_dolphin_jumps_traded_when_enabled(capsys):
+    trader = Trader()
+    trader.TRADE_DOLPHIN_JUMPS = True
+    orders = [trader.run(state).get(DIVING_GEAR) for state in sightings_states([3000] * 10 + [3015] * 10)]
+    assert [order.quantity for order in orders[-1]] == [50]
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas
+from research import forward_fill, rolling_mean, rolling_std, zscore
+
+
+def with_gaps(ticks: int = 400) -> np.ndarray:
+    random = np.random.default_rng(7)
+    values = 100 + np.cumsum(random.normal(size=(ticks, 3)), axis=0)
+    # No price yet at the start of the day, and a one-sided book later on
+    values[:30, 1] = np.nan
+    values[200:205, 2] = np.nan
+    return values
+
+
+def test_forward_fill_keeps_leading_gap():
+    values = with_gaps()
+    forward_fill(values)
+    assert np.isnan(values[:30, 1]).all() and not np.isnan(values[30:]).any()
+    assert (values[200:205, 2] == values[199, 2]).all()
+
+
+def test_rolling_matches_pandas():
+    values = with_gaps()
+    for window in (1, 5, 50):
+        expected = pandas.DataFrame(values).rolling(window).mean().to_numpy()
+        np.testing.assert_allclose(rolling_mean(values, window), expected, equal_nan=True)
+    for window in (5, 50):
+        expected = pandas.DataFrame(values).rolling(window).std().to_numpy()
+        np.testing.assert_allclose(rolling_std(values, window), expected, equal_nan=True, rtol=1e-6, atol=1e-9)
+
+
+def test_zscore_after_leading_gap():
+    values = with_gaps()
+    forward_fill(values)
+    z = zscore(values, 5, 20)
+    assert np.isnan(z[:49, 1]).all()
+    assert not np.isnan(z[49:, 1]).any()
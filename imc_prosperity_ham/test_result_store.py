@@ -0,0 +1,63 @@
+import pytest
+from datamodel import Order
+from fake_market import FakeMarket, day_files, read_prices, read_trades
+from result_store import ALL, ResultStore
+
+
+class CrashingTrader:
+    """
+    Buys a PEARL every tick and raises after `ticks` ticks
+    """
+    def __init__(self, ticks: int) -> None:
+        self.ticks = ticks
+
+    def run(self, state):
+        if state.timestamp >= self.ticks * 100:
+            raise RuntimeError('crashed')
+        print(f'tick {state.timestamp}')
+        book = state.order_depths['PEARLS']
+        return {'PEARLS': [Order('PEARLS', min(book.sell_orders), 1)]}
+
+
+def test_query_time_range(tmp_path):
+    store = ResultStore(str(tmp_path))
+    run = store.open_run('run')
+    for timestamp in range(0, 10000, 100):
+        run.append('pnl', 'PEARLS', timestamp, timestamp / 10)
+        run.log(timestamp, f'tick {timestamp}\n')
+    run.close()
+
+    rows = store.query('pnl', 'PEARLS', 250, 600)['run']
+    assert rows == {'timestamp': [300, 400, 500, 600], 'pnl': [30.0, 40.0, 50.0, 60.0]}
+    assert store.query('pnl', 'PEARLS', 20000, 30000) == {}
+    assert store.query('pnl', 'BANANAS', 0, 1000) == {}
+    assert store.logs('run', 100, 200) == ['tick 100\n', 'tick 200\n']
+
+
+def test_tables_written_as_they_fill(tmp_path):
+    store = ResultStore(str(tmp_path))
+    run = store.open_run('run')
+    run.flush_rows = 10
+    for timestamp in range(0, 2500, 100):
+        run.append('pnl', ALL, timestamp, 1.0)
+        run.log(timestamp, 'x')
+
+    # Nothing flushed explicitly: the first 20 rows are on disk, the last 5 still buffered
+    assert len(store.query('pnl', ALL, 0, 10 ** 9)['run']['timestamp']) == 20
+    assert store.logs('run', 0, 10 ** 9) == ['x'] * 20
+    run.close()
+    assert len(store.query('pnl', ALL, 0, 10 ** 9)['run']['timestamp']) == 25
+
+
+def test_crashed_replay_is_stored(tmp_path):
+    prices, trades = day_files(1, 0)
+    store = ResultStore(str(tmp_path))
+    run = store.open_run('crashed')
+    market = FakeMarket(CrashingTrader(300), run=run)
+
+    with pytest.raises(RuntimeError):
+        market.replay(read_prices(prices, end=1000 * 100), read_trades(trades))
+
+    rows = store.query('position', 'PEARLS', 0, 10 ** 9)['crashed']
+    assert rows['timestamp'] == list(range(0, 300 * 100, 100))
+    assert store.logs('crashed', 29900, 29900) == ['tick 29900\n']
@@ -0,0 +1,43 @@
+from datamodel import Order, OrderDepth, TradingState
+from risk import RiskEngine
+
+
+def engine(position, killed: bool = False) -> RiskEngine:
+    risk = RiskEngine()
+    order_depth = OrderDepth()
+    order_depth.buy_orders = {99000: 5}
+    order_depth.sell_orders = {99002: -5}
+    risk.update(TradingState(100, {}, {'DIVING_GEAR': order_depth}, {}, {}, position, {}))
+    if killed:
+        risk.killed_at = 100
+    return risk
+
+
+def units(orders):
+    return {key: sum(order.quantity for order in key_orders) for key, key_orders in orders.items()}
+
+
+def test_killed_reduces_once_across_keys():
+    risk = engine({'DIVING_GEAR': -5}, killed=True)
+    checked = risk.check({'PICNIC_BASKET': [Order('DIVING_GEAR', 99002, 5)], 'DIVING_GEAR': [Order('DIVING_GEAR', 99002, 5)]})
+    assert units(checked) == {'PICNIC_BASKET': 5, 'DIVING_GEAR': 0}
+    assert risk.blocked == {'DIVING_GEAR': 5}
+
+
+def test_killed_reduces_once_within_key():
+    risk = engine({'DIVING_GEAR': 4}, killed=True)
+    checked = risk.check({'DIVING_GEAR': [Order('DIVING_GEAR', 99000, -3), Order('DIVING_GEAR', 99000, -3)]})
+    assert units(checked) == {'DIVING_GEAR': -4}
+
+
+def test_killed_blocks_opening():
+    risk = engine({}, killed=True)
+    checked = risk.check({'DIVING_GEAR': [Order('DIVING_GEAR', 99002, 5), Order('DIVING_GEAR', 99000, -5)]})
+    assert units(checked) == {'DIVING_GEAR': 0}
+
+
+def test_not_killed_passes():
+    risk = engine({'DIVING_GEAR': -5})
+    orders = {'PICNIC_BASKET': [Order('DIVING_GEAR', 99002, 5)], 'DIVING_GEAR': [Order('DIVING_GEAR', 99002, 5)]}
+    assert units(risk.check(orders)) == {'PICNIC_BASKET': 5, 'DIVING_GEAR': 5}
+    assert risk.blocked == {}
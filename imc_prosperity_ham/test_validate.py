@@ -0,0 +1,30 @@
+from validate import Report, check_prices_row
+
+
+def row(mid: str, bids, asks):
+    fields = {'timestamp': '100', 'product': 'PEARLS', 'mid_price': mid}
+    for side, levels in (('bid', bids), ('ask', asks)):
+        for level in (1, 2, 3):
+            price, volume = levels[level - 1] if level <= len(levels) else ('', '')
+            fields[f'{side}_price_{level}'] = str(price)
+            fields[f'{side}_volume_{level}'] = str(volume)
+    return fields
+
+
+def test_zero_volume_level_reported_once():
+    report = Report('test')
+    bids, asks, usable = check_prices_row(row('10000.0', [(9998, 0), (9996, 5)], [(10002, 3)]), report)
+    assert report.counts == {'non-positive volume': 1}
+    assert (bids, asks, usable) == ([(9996, 5)], [(10002, 3)], True)
+
+
+def test_wrong_mid_price():
+    report = Report('test')
+    check_prices_row(row('10001.0', [(9998, 2)], [(10002, 3)]), report)
+    assert report.counts == {'wrong mid price': 1}
+
+
+def test_wrong_mid_price_next_to_zero_volume():
+    report = Report('test')
+    check_prices_row(row('9999.0', [(9998, 0), (9996, 5)], [(10002, 3)]), report)
+    assert report.counts == {'non-positive volume': 1, 'wrong mid price': 1}
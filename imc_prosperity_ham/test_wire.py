@@ -0,0 +1,93 @@
+import json
+import pytest
+from datamodel import Listing, Order, OrderDepth, Trade, TradingState
+from fake_market import FakeMarket, day_files, read_prices, read_trades
+from wire import ORDERS, STATE, StateView, decode_orders, encode_orders, encode_state, same_state, unpack
+
+
+def round_trip(state: TradingState) -> StateView:
+    view = StateView(encode_state(state))
+    assert same_state(state, view)
+    assert json.loads(view.toJSON()) == json.loads(state.toJSON())
+    return view
+
+
+def order_tuples(orders):
+    return {key: [(o.symbol, o.price, o.quantity, type(o.price), type(o.quantity)) for o in key_orders] for key, key_orders in orders.items()}
+
+
+def depth(buy_orders, sell_orders) -> OrderDepth:
+    order_depth = OrderDepth()
+    order_depth.buy_orders = buy_orders
+    order_depth.sell_orders = sell_orders
+    return order_depth
+
+
+def test_recorded_day_round_trip():
+    prices, trades_file = day_files(2, 1)
+    books, day_trades = read_prices(prices), read_trades(trades_file)
+
+    market = FakeMarket(None)
+    market.position = {'PEARLS': -7, 'BANANAS': 20}
+    market.own_trades = {'PEARLS': [Trade('PEARLS', 10002, 3, '', 'SUBMISSION')]}
+    for timestamp in sorted(books)[:500]:
+        state = market.make_state(timestamp, books[timestamp], day_trades.get(timestamp, {}))
+        state.observations = {'DOLPHIN_SIGHTINGS': 3000}
+        round_trip(state)
+
+
+def test_empty_state():
+    view = round_trip(TradingState(0, {}, {}, {}, {}, {}, {}))
+    assert view.order_depths == {} and view.listings == {} and view.position == {}
+
+
+def test_empty_books():
+    state = TradingState(100, {'PEARLS': Listing('PEARLS', 'PEARLS', 'SEASHELLS'), 'BANANAS': Listing('BANANAS', 'BANANAS', 'SEASHELLS')},
+                         {'PEARLS': depth({}, {}), 'BANANAS': depth({}, {4950: -3})}, {}, {}, {'PEARLS': 0}, {})
+    view = round_trip(state)
+    assert view.order_depths['PEARLS'].buy_orders == {} and view.order_depths['PEARLS'].sell_orders == {}
+    assert view.order_depths['BANANAS'].buy_orders == {} and view.order_depths['BANANAS'].sell_orders == {4950: -3}
+
+
+@pytest.mark.parametrize('name', ['', '\0', 'SUB\0MISSION', '\0\0', 'Caesar\0', 'Olivia €'])
+def test_strings(name):
+    state = TradingState(200, {'PEARLS': Listing('PEARLS', 'PEARLS', name)}, {'PEARLS': depth({9998: 2}, {10002: -2})},
+                         {'PEARLS': [Trade('PEARLS', 10002, 3, name, 'SUBMISSION')]},
+                         {'PEARLS': [Trade('PEARLS', 9998, 1, '', name), Trade('PEARLS', 9999, 2, name, name)]},
+                         {'PEARLS': 3}, {name: 7})
+    view = round_trip(state)
+    assert view.listings['PEARLS'].denomination == name
+    assert [(t.buyer, t.seller) for t in view.market_trades['PEARLS']] == [('', name), (name, name)]
+    assert view.observations == {name: 7}
+
+
+def test_only_empty_string():
+    state = TradingState(0, {}, {}, {}, {}, {'': 1}, {})
+    assert round_trip(state).position == {'': 1}
+
+
+def test_orders_round_trip():
+    orders = {
+        'PEARLS': [Order('PEARLS', 9998, 5), Order('PEARLS', 10002, -5)],
+        'COCONUTS': [Order('COCONUTS', 8000, 20.0), Order('COCONUTS', 7999, 1 / 30 * 600), Order('COCONUTS', 7999.5, -2)],
+        'PICNIC_BASKET': [Order('DIVING_GEAR', 99000, -3)],
+        'BANANAS': [],
+    }
+    assert order_tuples(decode_orders(encode_orders(orders))) == order_tuples(orders)
+
+
+def test_no_orders():
+    assert decode_orders(encode_orders({})) == {}
+
+
+@pytest.mark.parametrize('symbol', ['', '\0', 'PINA\0COLADAS'])
+def test_order_strings(symbol):
+    orders = {symbol: [Order(symbol, 15000, 0.5)], 'PEARLS': [Order('PEARLS', 10000, 1)]}
+    assert order_tuples(decode_orders(encode_orders(orders))) == order_tuples(orders)
+
+
+def test_wrong_kind():
+    with pytest.raises(ValueError):
+        unpack(encode_orders({'PEARLS': [Order('PEARLS', 10000, 1)]}), STATE, 'q')
+    with pytest.raises(ValueError):
+        unpack(encode_state(TradingState(0, {}, {}, {}, {}, {}, {})), ORDERS, 'd')
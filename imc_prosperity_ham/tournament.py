@@ -0,0 +1,114 @@
+import importlib.util
+import math
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional
+from fake_market import DATA_DIR, REPAIRED_DIR, FakeMarket, day_files, read_prices, read_trades
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_TRADERS = ['sma_trader', 'sample_trader_round1', 'sample_trader_round2', 'sample_trader_round3', 'sample_trader_round4']
+
+# Decoded day, set before the worker processes are forked so that they share it instead of reading the files again
+_books = None
+_trades = None
+
+
+def load_module(module_name: str, copy: int = 0):
+    """
+    Private copy of a trader module. Class attributes such as Trader.banana_prices are shared
+    by every instance of a class, so each contestant gets its own class object to keep them apart.
+    """
+    spec = importlib.util.spec_from_file_location(f'{module_name}__{copy}', os.path.join(HERE, f'{module_name}.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_trader(module_name: str, copy: int = 0):
+    """
+    New Trader from a private copy of its module, see load_module
+    """
+    return load_module(module_name, copy).Trader()
+
+
+def sharpe(pnl_history: List[float]) -> float:
+    """
+    Sharpe ratio of the tick to tick PnL changes over the whole day
+    """
+    changes = [b - a for a, b in zip(pnl_history, pnl_history[1:])]
+    if len(changes) < 2:
+        return 0.0
+
+    mean = sum(changes) / len(changes)
+    variance = sum((change - mean) ** 2 for change in changes) / (len(changes) - 1)
+    if variance == 0:
+        return 0.0
+    return mean / math.sqrt(variance) * math.sqrt(len(changes))
+
+
+def play(entry: tuple) -> Dict:
+    """
+    Runs one contestant over the shared day in its own market, so positions are never shared
+    """
+    copy, module_name = entry
+    market = FakeMarket(load_trader(module_name, copy))
+
+    error: Optional[str] = None
+    try:
+        market.replay(_books, _trades)
+    except Exception:
+        error = traceback.format_exc(limit=1).strip().splitlines()[-1]
+
+    latencies = sorted(market.latencies)
+    return {
+        'trader': module_name,
+        'pnl': sum(market.pnl().values()),
+        'sharpe': sharpe(market.pnl_history),
+        'ticks': len(latencies),
+        'mean_latency': sum(latencies) / len(latencies) if latencies else 0.0,
+        'p99_latency': latencies[int(0.99 * (len(latencies) - 1))] if latencies else 0.0,
+        'error': error,
+    }
+
+
+def tournament(module_names: List[str], prices_file, trades_file=None, processes: Optional[int] = None) -> List[Dict]:
+    """
+    Decodes the day once and runs every trader on it in parallel, one process each.
+
+    Returns:
+    List of results sorted by PnL, best first
+    """
+    global _books, _trades
+    _books = read_prices(prices_file)
+    _trades = read_trades(trades_file)
+
+    with multiprocessing.get_context('fork').Pool(processes or min(len(module_names), os.cpu_count() or 1)) as pool:
+        results = pool.map(play, list(enumerate(module_names)))
+
+    return sorted(results, key=lambda result: (result['error'] is None, result['pnl']), reverse=True)
+
+
+def leaderboard(results: List[Dict]) -> str:
+    lines = [f'{"#":>2} {"trader":<24} {"pnl":>10} {"sharpe":>7} {"mean us":>8} {"p99 us":>8}']
+    for rank, result in enumerate(results, 1):
+        line = f'{rank:>2} {result["trader"]:<24} {result["pnl"]:>10.1f} {result["sharpe"]:>7.2f} {result["mean_latency"] * 1e6:>8.0f} {result["p99_latency"] * 1e6:>8.0f}'
+        if result['error']:
+            line += f'  crashed after {result["ticks"]} ticks: {result["error"]}'
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # python tournament.py 2 1 [repaired] [trader modules...]   "repaired" plays the copy validate.py wrote
+    round, day = int(sys.argv[1]), int(sys.argv[2])
+    repaired = len(sys.argv) > 3 and sys.argv[3] == 'repaired'
+    module_names = sys.argv[3 + repaired:] or DEFAULT_TRADERS
+
+    start = time.perf_counter()
+    results = tournament(module_names, *day_files(round, day, REPAIRED_DIR if repaired else DATA_DIR))
+    print(leaderboard(results))
+    print(f'{len(module_names)} traders in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,301 @@
+import csv
+import glob
+import multiprocessing
+import os
+import re
+import sys
+import time
+from array import array
+from typing import Dict, List, Optional, Tuple
+from fake_market import DATA_DIR, REPAIRED_DIR
+from regime import TICK
+
+# Examples kept of every issue, as (timestamp, product, detail)
+EXAMPLES = 3
+
+
+class Report:
+    """
+    Counts of every kind of issue found in one day, with a few examples of each
+    """
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.counts: Dict[str, int] = {}
+        self.examples: Dict[str, List[tuple]] = {}
+        self.rows = 0
+        self.repaired = 0
+
+    def add(self, issue: str, timestamp: int, product: str, detail: str = '') -> None:
+        self.counts[issue] = self.counts.get(issue, 0) + 1
+        examples = self.examples.setdefault(issue, [])
+        if len(examples) < EXAMPLES:
+            examples.append((timestamp, product, detail))
+
+    def lines(self) -> List[str]:
+        lines = [f'{self.name}: {self.rows} rows, {sum(self.counts.values())} issues, {self.repaired} rows repaired']
+        for issue, count in sorted(self.counts.items()):
+            examples = ', '.join(f'{timestamp} {product} {detail}'.strip() for timestamp, product, detail in self.examples[issue])
+            lines.append(f'  {issue:<24} {count:>7}  e.g. {examples}')
+        return lines
+
+
+def levels(row: Dict[str, str], side: str) -> List[Tuple[int, int]]:
+    """
+    (price, volume) of the levels of one side that have a price, best first as in the file
+    """
+    return [(int(row[f'{side}_price_{level}']), int(row[f'{side}_volume_{level}'] or 0))
+            for level in (1, 2, 3) if row[f'{side}_price_{level}']]
+
+
+def check_prices_row(row: Dict[str, str], report: Report) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]], bool]:
+    """
+    Checks one snapshot of one product.
+
+    Returns:
+    (bids, asks, usable) where bids and asks are sorted best first and usable is False for a crossed book
+    """
+    timestamp, product = int(row['timestamp']), row['product']
+
+    for side in ('bid', 'ask'):
+        present = [bool(row[f'{side}_price_{level}']) for level in (1, 2, 3)]
+        if present != sorted(present, reverse=True):
+            report.add('level gap', timestamp, product, side)
+
+    bids = levels(row, 'bid')
+    asks = levels(row, 'ask')
+    if [price for price, _ in bids] != sorted((price for price, _ in bids), reverse=True) or [price for price, _ in asks] != sorted(price for price, _ in asks):
+        report.add('unsorted levels', timestamp, product)
+    bids.sort(reverse=True)
+    asks.sort()
+    # The mid price in the file was computed from the book as recorded, levels without volume included
+    recorded_mid = (bids[0][0] + asks[0][0]) / 2 if bids and asks else None
+
+    # A level without volume is no level, it is dropped from the repaired copy
+    if any(volume <= 0 for _, volume in bids + asks):
+        report.add('non-positive volume', timestamp, product)
+        bids = [level for level in bids if level[1] > 0]
+        asks = [level for level in asks if level[1] > 0]
+
+    if not bids and not asks:
+        report.add('empty book', timestamp, product)
+    elif not bids or not asks:
+        report.add('one-sided book', timestamp, product, 'no bids' if not bids else 'no asks')
+    elif bids[0][0] >= asks[0][0]:
+        report.add('crossed book', timestamp, product, f'{bids[0][0]} >= {asks[0][0]}')
+        return bids, asks, False
+    elif recorded_mid is not None and float(row['mid_price'] or 0) != recorded_mid:
+        report.add('wrong mid price', timestamp, product, f'{row["mid_price"]} != {recorded_mid}')
+
+    return bids, asks, True
+
+
+def repaired_row(row: Dict[str, str], bids: List[Tuple[int, int]], asks: List[Tuple[int, int]], mid: float, timestamp: int) -> Dict[str, str]:
+    """
+    Row with the levels written best first without gaps and the given mid price
+    """
+    repaired = dict(row)
+    repaired['timestamp'] = str(timestamp)
+    for side, side_levels in (('bid', bids), ('ask', asks)):
+        for level in (1, 2, 3):
+            price, volume = side_levels[level - 1] if level <= len(side_levels) else ('', '')
+            repaired[f'{side}_price_{level}'] = str(price)
+            repaired[f'{side}_volume_{level}'] = str(volume)
+    repaired['mid_price'] = str(mid)
+    return repaired
+
+
+def validate_prices(file: str, output: Optional[str], report: Report) -> Dict[str, Dict[int, Tuple[Optional[int], Optional[int]]]]:
+    """
+    One pass over a prices file. With an output path, writes the repaired copy sorted by timestamp and its index:
+    - levels are sorted best first without gaps, levels without volume are dropped
+    - a crossed book is replaced by the last good snapshot of the product
+    - a missing timestamp gets the last snapshot of the product again
+    - a one-sided or empty book keeps its levels, with the previous mid price instead of 0
+
+    Returns:
+    product -> timestamp -> (best bid, best ask), for checking the trades of the day
+    """
+    tops: Dict[str, Dict[int, Tuple[Optional[int], Optional[int]]]] = {}
+    # Last good (bids, asks, mid) and last timestamp of every product
+    last: Dict[str, tuple] = {}
+    last_timestamp: Dict[str, int] = {}
+    out_rows: Dict[int, List[Dict[str, str]]] = {}
+
+    with open(file, newline='') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        fieldnames = reader.fieldnames
+
+        for row in reader:
+            report.rows += 1
+            timestamp, product = int(row['timestamp']), row['product']
+
+            previous = last_timestamp.get(product)
+            if previous is not None and timestamp <= previous:
+                report.add('timestamp out of order', timestamp, product, f'after {previous}')
+            elif previous is not None and timestamp > previous + TICK:
+                report.add('missing timestamps', timestamp, product, f'{(timestamp - previous) // TICK - 1} after {previous}')
+                if output is not None and product in last:
+                    for missing in range(previous + TICK, timestamp, TICK):
+                        out_rows.setdefault(missing, []).append(repaired_row(row, *last[product], missing))
+                        report.repaired += 1
+            last_timestamp[product] = max(timestamp, previous if previous is not None else timestamp)
+
+            bids, asks, usable = check_prices_row(row, report)
+            if not usable and product in last:
+                bids, asks, mid = last[product]
+            elif bids and asks:
+                mid = (bids[0][0] + asks[0][0]) / 2
+            else:
+                mid = last[product][2] if product in last else float(row['mid_price'] or 0)
+
+            if usable:
+                last[product] = (bids, asks, mid)
+
+            tops.setdefault(product, {})[timestamp] = (bids[0][0] if bids else None, asks[0][0] if asks else None)
+            if output is not None:
+                written = repaired_row(row, bids, asks, mid, timestamp)
+                if written != row:
+                    report.repaired += 1
+                out_rows.setdefault(timestamp, []).append(written)
+
+    if output is not None:
+        write_indexed(output, fieldnames, out_rows)
+
+    return tops
+
+
+def write_indexed(output: str, fieldnames: List[str], rows: Dict[int, List[Dict[str, str]]]) -> None:
+    """
+    Writes the rows sorted by timestamp, and next to them an .idx file of int64 (timestamp, byte offset) pairs,
+    one per timestamp, which fake_market.read_prices uses to seek
+    """
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    index = array('q')
+
+    with open(output, 'w', newline='') as f:
+        f.write(';'.join(fieldnames) + '\n')
+        writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';', lineterminator='\n')
+        for timestamp in sorted(rows):
+            index.extend((timestamp, f.tell()))
+            writer.writerows(rows[timestamp])
+
+    with open(os.path.splitext(output)[0] + '.idx', 'wb') as f:
+        f.write(index.tobytes())
+
+
+def validate_trades(file: str, output: Optional[str], tops, report: Report) -> None:
+    """
+    One pass over a trades file. Trades with a quantity below 1 or a price that is not a number are dropped
+    from the repaired copy. Trades outside the book are only reported: they happened.
+
+    A trade at timestamp t happened between the snapshots at t - 100 and t, so it is outside the book
+    when it is outside the best bid and ask of both.
+    """
+    kept = []
+    named = file.endswith('_wn.csv')
+    previous = None
+
+    with open(file, newline='') as f:
+        reader = csv.DictReader(f, delimiter=';')
+        fieldnames = reader.fieldnames
+
+        for row in reader:
+            report.rows += 1
+            timestamp, symbol = int(row['timestamp']), row['symbol']
+
+            if previous is not None and timestamp < previous:
+                report.add('trade out of order', timestamp, symbol, f'after {previous}')
+            previous = timestamp
+
+            try:
+                price, quantity = float(row['price']), int(row['quantity'])
+            except ValueError:
+                report.add('unreadable trade', timestamp, symbol, f'{row["price"]} x {row["quantity"]}')
+                report.repaired += 1
+                continue
+            if quantity < 1:
+                report.add('non-positive quantity', timestamp, symbol, str(quantity))
+                report.repaired += 1
+                continue
+
+            # Anonymous trades are expected in the _nn files, not in the _wn files that name both sides
+            if named and (not row['buyer'] or not row['seller']):
+                report.add('missing counterparty', timestamp, symbol, f'{row["buyer"]!r} {row["seller"]!r}')
+
+            if tops is not None:
+                if symbol not in tops:
+                    report.add('trade without book', timestamp, symbol)
+                else:
+                    books = [tops[symbol][t] for t in (timestamp - TICK, timestamp) if t in tops[symbol]]
+                    if books and all((bid is not None and price < bid) or (ask is not None and price > ask) for bid, ask in books):
+                        report.add('trade outside book', timestamp, symbol, f'{price:g} vs {books[-1][0]}/{books[-1][1]}')
+
+            kept.append(row)
+
+    if output is not None:
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, delimiter=';', lineterminator='\n')
+            writer.writeheader()
+            writer.writerows(kept)
+
+
+def day_jobs(data_dir: str = DATA_DIR) -> List[Tuple[str, Optional[str], List[str]]]:
+    """
+    Every recorded day as (name, prices file or None, [trades files]), the named (_wn) trades of the
+    round 5 folder going with the day they belong to
+    """
+    days: Dict[Tuple[int, int], list] = {}
+    for file in sorted(glob.glob(os.path.join(data_dir, 'island-data-bottle-round-*', '*.csv'))):
+        match = re.search(r'(prices|trades)_round_(\d+)_day_(-?\d+)', os.path.basename(file))
+        if match is None:
+            continue
+        kind, round, day = match.group(1), int(match.group(2)), int(match.group(3))
+        entry = days.setdefault((round, day), [f'round {round} day {day}', None, []])
+        if kind == 'prices':
+            entry[1] = file
+        else:
+            entry[2].append(file)
+    return [tuple(days[key]) for key in sorted(days)]
+
+
+def validate_day(job: tuple) -> Report:
+    """
+    Validates one day, prices first so that the trades can be checked against the book
+    """
+    (name, prices, trades), data_dir, output_dir = job
+    report = Report(name)
+
+    def output(file: str) -> Optional[str]:
+        return None if output_dir is None else os.path.join(output_dir, os.path.relpath(file, data_dir))
+
+    tops = validate_prices(prices, output(prices), report) if prices is not None else None
+    for file in trades:
+        validate_trades(file, output(file), tops, report)
+
+    return report
+
+
+def validate(data_dir: str = DATA_DIR, output_dir: Optional[str] = REPAIRED_DIR, processes: Optional[int] = None) -> List[Report]:
+    """
+    Validates (and with an output_dir repairs) every day of data_dir, one day per process
+    """
+    jobs = [(day, data_dir, output_dir) for day in day_jobs(data_dir)]
+    with multiprocessing.get_context('fork').Pool(processes or os.cpu_count() or 1) as pool:
+        return pool.map(validate_day, jobs)
+
+
+if __name__ == '__main__':
+    # python validate.py [output directory, "-" to only report]
+    output_dir = REPAIRED_DIR
+    if len(sys.argv) > 1:
+        output_dir = None if sys.argv[1] == '-' else sys.argv[1]
+
+    start = time.perf_counter()
+    reports = validate(DATA_DIR, output_dir)
+    elapsed = time.perf_counter() - start
+
+    for report in reports:
+        print('\n'.join(report.lines()))
+    print(f'{len(reports)} days, {sum(report.rows for report in reports)} rows in {elapsed:.1f}s'
+          + (f', repaired copy in {output_dir}' if output_dir else ''))
@@ -0,0 +1,181 @@
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+from typing import Dict, List, Optional, Tuple
+from fake_market import Day, FakeMarket, day_files, read_prices, read_trades, recorded_days
+from tournament import load_module
+
+# Parameters worth fitting for each strategy, with the products whose PnL scores it.
+# The first value of every parameter is the one hard coded in the trader.
+STRATEGIES = {
+    'pearls': {
+        'products': ['PEARLS'],
+        'grid': {'PEARLS_PRICE': [10000, 9999, 10001]},
+    },
+    'bananas': {
+        'products': ['BANANAS'],
+        'grid': {'BANANA_SMA_BIG_SIZE': [200, 100, 400], 'BANANA_SMA_LITTLE_SIZE': [50, 20]},
+    },
+    'pina_coco': {
+        'products': ['PINA_COLADAS', 'COCONUTS'],
+        'grid': {'PINACOLADA_PRICE': [15000, 14900], 'COCONUT_PRICE': [8000, 7950]},
+    },
+}
+
+# Decoded days, set before the worker processes are forked so that every fold reads the same copy
+_days: Dict[Day, tuple] = {}
+
+
+def folds(days: List[Day], train: int = 2, test: int = 1) -> List[Tuple[List[Day], List[Day]]]:
+    """
+    Rolling walk-forward folds: fit on `train` consecutive days, test on the `test` days after them, then move
+    forward by `test` days.
+
+    The days must be distinct days in the order they were traded (fake_market.recorded_days), so that
+    a test day is never one of its own training days under another round's file name.
+    """
+    day_numbers = [day for _, day in days]
+    if day_numbers != sorted(set(day_numbers)):
+        raise ValueError(f'days must be distinct and in trading order: {days}')
+
+    return [(days[start:start + train], days[start + train:start + train + test])
+            for start in range(0, len(days) - train - test + 1, test)]
+
+
+def parameter_sets(grid: Dict[str, list]) -> List[Dict[str, object]]:
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def evaluate(job: tuple) -> float:
+    """
+    PnL of one parameter set of one strategy on one day. Only the strategy's products are replayed,
+    so the other strategies of the trader neither cost time nor move the score.
+    """
+    module_name, strategy, index, day = job
+    products = STRATEGIES[strategy]['products']
+    parameters = parameter_sets(STRATEGIES[strategy]['grid'])[index]
+
+    books, trades = _days[day]
+    if not any(product in products_books for products_books in books.values() for product in products):
+        return 0.0
+    books = {timestamp: {product: book for product, book in products_books.items() if product in products}
+             for timestamp, products_books in books.items()}
+
+    # Private module copy, so setting class attributes does not leak into the other jobs
+    module = load_module(module_name, index)
+    for name, value in parameters.items():
+        setattr(module.Trader, name, value)
+
+    market = FakeMarket(module.Trader())
+    try:
+        market.replay(books, trades)
+    except Exception:
+        # A crash keeps the PnL made until then, the report shows the traceback line
+        print(f'{strategy} {parameters} on {day}: {traceback.format_exc(limit=1).strip().splitlines()[-1]}', file=sys.stderr)
+
+    pnl = market.pnl()
+    return sum(pnl.get(product, 0.0) for product in products)
+
+
+def walk_forward(module_name: str, strategies: List[str], train: int = 2, test: int = 1, processes: Optional[int] = None) -> Dict[str, List[Dict]]:
+    """
+    Fits every strategy on each fold's train days, picking the parameter set with the best mean PnL,
+    and scores the pick on the fold's test days. Each strategy gets its own folds, over the distinct
+    days that have all of its products.
+
+    Every (parameter set, day) pair is replayed once even though it appears in several folds, and the days
+    are decoded once before the workers are forked.
+
+    Returns:
+    strategy -> one dict per fold with the train and test days, the chosen parameters, the mean daily PnL
+    of every parameter set on the train and test days, and the index of the chosen set
+    """
+    global _days
+    strategy_folds = {strategy: folds(recorded_days(STRATEGIES[strategy]['products']), train, test) for strategy in strategies}
+    used = sorted({day for fold_days in strategy_folds.values() for train_days, test_days in fold_days for day in train_days + test_days})
+    _days = {}
+    for day in used:
+        prices, trades = day_files(*day)
+        _days[day] = (read_prices(prices), read_trades(trades))
+
+    jobs = [(module_name, strategy, index, day)
+            for strategy in strategies
+            for index in range(len(parameter_sets(STRATEGIES[strategy]['grid'])))
+            for day in sorted({day for train_days, test_days in strategy_folds[strategy] for day in train_days + test_days})]
+
+    with multiprocessing.get_context('fork').Pool(processes or os.cpu_count() or 1) as pool:
+        scores = dict(zip([job[1:] for job in jobs], pool.map(evaluate, jobs)))
+
+    results: Dict[str, List[Dict]] = {}
+    for strategy in strategies:
+        sets = parameter_sets(STRATEGIES[strategy]['grid'])
+        results[strategy] = []
+        for train_days, test_days in strategy_folds[strategy]:
+            in_sample = [sum(scores[strategy, index, day] for day in train_days) / len(train_days) for index in range(len(sets))]
+            out_of_sample = [sum(scores[strategy, index, day] for day in test_days) / len(test_days) for index in range(len(sets))]
+            chosen = max(range(len(sets)), key=lambda index: in_sample[index])
+            results[strategy].append({
+                'train': train_days,
+                'test': test_days,
+                'chosen': chosen,
+                'parameters': sets[chosen],
+                'in_sample': in_sample,
+                'out_of_sample': out_of_sample,
+            })
+
+    return results
+
+
+def overfitting_report(strategy: str, strategy_folds: List[Dict]) -> str:
+    """
+    Per fold: the chosen parameters, their train and test PnL per day and the rank of the test PnL among all sets.
+
+    Summary:
+    efficiency: mean test PnL of the chosen sets over their mean train PnL, far below 1 means the fit does not carry over
+    beat default: folds where the chosen set did better out of sample than the hard coded one (set 0)
+    below median: folds where the chosen set ranked in the worse half out of sample, which is what
+                  picking at random would do half of the time
+    """
+    lines = [f'{strategy}']
+    if not strategy_folds:
+        lines.append('  not enough days with all of its products for one fold')
+        return '\n'.join(lines)
+
+    below_median = 0
+    for fold in strategy_folds:
+        chosen = fold['chosen']
+        out_of_sample = fold['out_of_sample']
+        rank = 1 + sum(pnl > out_of_sample[chosen] for pnl in out_of_sample)
+        below_median += rank > (len(out_of_sample) + 1) / 2
+        days = lambda days: ','.join(f'{day}' for _, day in days)
+        lines.append(f'  train days {days(fold["train"]):<9} test day {days(fold["test"]):<3} {fold["parameters"]}  '
+                     f'train {fold["in_sample"][chosen]:>9.1f}  test {out_of_sample[chosen]:>9.1f}  '
+                     f'default {out_of_sample[0]:>9.1f}  rank {rank}/{len(out_of_sample)}')
+
+    in_sample = sum(fold['in_sample'][fold['chosen']] for fold in strategy_folds) / len(strategy_folds)
+    out_of_sample = sum(fold['out_of_sample'][fold['chosen']] for fold in strategy_folds) / len(strategy_folds)
+    beat_default = sum(fold['out_of_sample'][fold['chosen']] > fold['out_of_sample'][0] for fold in strategy_folds)
+    # A ratio of losses says nothing, only report it when the fit made money in sample
+    efficiency = f'{out_of_sample / in_sample:.2f}' if in_sample > 0 else '-'
+    lines.append(f'  mean train {in_sample:.1f}, mean test {out_of_sample:.1f}, efficiency {efficiency}, '
+                 f'beat default {beat_default}/{len(strategy_folds)}, below median {below_median}/{len(strategy_folds)}')
+
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    # python walk_forward.py [trader module] [train days] [test days] [strategies...]
+    module_name = sys.argv[1] if len(sys.argv) > 1 else 'sample_trader_round4'
+    train = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    test = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    strategies = sys.argv[4:] or list(STRATEGIES)
+
+    start = time.perf_counter()
+    results = walk_forward(module_name, strategies, train, test)
+    for strategy, strategy_folds in results.items():
+        print(overfitting_report(strategy, strategy_folds))
+    print(f'{len(strategies)} strategies in {time.perf_counter() - start:.1f}s')
@@ -0,0 +1,323 @@
+import json
+import pickle
+import struct
+import sys
+import time
+from array import array
+from typing import Dict, List, Tuple
+from datamodel import Listing, Order, Trade, TradingState, Symbol
+
+# Every message: magic, kind, version, length of the string block.
+# Then the string block padded to 8 bytes, then 8 byte words: int64 for a state, float64 for orders.
+# The string block is the number of strings and their lengths in bytes as uint32, then the UTF-8 strings back to back,
+# so a string may be empty or contain any character, NUL included.
+HEADER = struct.Struct('<2sBBI')
+MAGIC = b'PW'
+VERSION = 2
+STATE = 1
+ORDERS = 2
+
+# Words per entry of the fixed size sections of a state
+LISTING_WORDS = 3      # symbol, product, denomination
+TRADE_WORDS = 5        # symbol, price, quantity, buyer, seller
+PAIR_WORDS = 2         # product, value (positions and observations)
+# Words per order: symbol, price, quantity, flags
+ORDER_WORDS = 4
+
+
+class Strings:
+    """
+    String table of one message: every symbol and trader name is written once and referred to by index
+    """
+    def __init__(self) -> None:
+        self.index: Dict[str, int] = {}
+
+    def __call__(self, string: str) -> int:
+        index = self.index.get(string)
+        if index is None:
+            index = self.index[string] = len(self.index)
+        return index
+
+    def pack(self, kind: int, words: array) -> bytes:
+        encoded = [string.encode() for string in self.index]
+        strings = struct.pack(f'<{1 + len(encoded)}I', len(encoded), *map(len, encoded)) + b''.join(encoded)
+        padding = b'\0' * (-(HEADER.size + len(strings)) % 8)
+        return HEADER.pack(MAGIC, kind, VERSION, len(strings)) + strings + padding + words.tobytes()
+
+
+def unpack(buffer, kind: int, typecode: str) -> Tuple[List[str], memoryview]:
+    """
+    Returns the string table and the words of a message, the words being a view on the buffer, not a copy
+    """
+    magic, message_kind, version, length = HEADER.unpack_from(buffer)
+    if magic != MAGIC or message_kind != kind or version != VERSION:
+        raise ValueError(f'not a version {VERSION} message of kind {kind}: {magic!r} {message_kind} {version}')
+
+    strings = []
+    if length:
+        count, = struct.unpack_from('<I', buffer, HEADER.size)
+        at = HEADER.size + 4 * (1 + count)
+        for size in struct.unpack_from(f'<{count}I', buffer, HEADER.size + 4):
+            strings.append(bytes(buffer[at:at + size]).decode())
+            at += size
+    start = HEADER.size + length + (-(HEADER.size + length) % 8)
+    return strings, memoryview(buffer)[start:].cast(typecode)
+
+
+def encode_state(state: TradingState) -> bytes:
+    strings = Strings()
+    trades = [trade for trades in state.own_trades.values() for trade in trades]
+    own = len(trades)
+    trades += [trade for trades in state.market_trades.values() for trade in trades]
+
+    # Collected in a list and converted to an array once, which is faster than growing the array
+    words = [state.timestamp, len(state.listings), len(state.order_depths), own, len(trades) - own,
+             len(state.position), len(state.observations)]
+
+    for listing in state.listings.values():
+        words += strings(listing.symbol), strings(listing.product), strings(listing.denomination)
+
+    for symbol, order_depth in state.order_depths.items():
+        words += strings(symbol), len(order_depth.buy_orders), len(order_depth.sell_orders)
+        for levels in (order_depth.buy_orders, order_depth.sell_orders):
+            for level in levels.items():
+                words += level
+
+    for trade in trades:
+        words += strings(trade.symbol), trade.price, trade.quantity, strings(trade.buyer or ''), strings(trade.seller or '')
+
+    for pairs in (state.position, state.observations):
+        for product, value in pairs.items():
+            words += strings(product), value
+
+    return strings.pack(STATE, array('q', words))
+
+
+class OrderDepthView:
+    """
+    OrderDepth read from an encoded state. The price levels are only turned into dicts when first used,
+    so products a trader never looks at cost nothing.
+    """
+    __slots__ = ('_words', '_start', '_buys', '_sells', '_buy_orders', '_sell_orders')
+
+    def __init__(self, words: memoryview, start: int, buys: int, sells: int) -> None:
+        self._words = words
+        self._start = start
+        self._buys = buys
+        self._sells = sells
+        self._buy_orders = None
+        self._sell_orders = None
+
+    @property
+    def buy_orders(self) -> Dict[int, int]:
+        if self._buy_orders is None:
+            levels = self._words[self._start:self._start + 2 * self._buys].tolist()
+            self._buy_orders = dict(zip(levels[::2], levels[1::2]))
+        return self._buy_orders
+
+    @property
+    def sell_orders(self) -> Dict[int, int]:
+        if self._sell_orders is None:
+            start = self._start + 2 * self._buys
+            levels = self._words[start:start + 2 * self._sells].tolist()
+            self._sell_orders = dict(zip(levels[::2], levels[1::2]))
+        return self._sell_orders
+
+    # ProsperityEncoder serializes o.__dict__, which has to show the same fields as an OrderDepth
+    @property
+    def __dict__(self) -> Dict:
+        return {'buy_orders': self.buy_orders, 'sell_orders': self.sell_orders}
+
+
+class StateView:
+    """
+    TradingState read from an encoded state without copying it: the timestamp and the order depths are
+    found when the view is made, everything else is decoded the first time it is read.
+    Reads like a TradingState, including through ProsperityEncoder.
+    """
+    __slots__ = ('timestamp', 'order_depths', '_strings', '_words', '_listing_count', '_trades_at', '_own', '_market',
+                 '_pairs_at', '_positions', '_observations', '_listings', '_own_trades', '_market_trades', '_position', '_observation_values')
+
+    def __init__(self, buffer) -> None:
+        strings, words = unpack(buffer, STATE, 'q')
+        self._strings = strings
+        self._words = words
+        self.timestamp, self._listing_count, depths, self._own, self._market, self._positions, self._observations = words[:7]
+
+        # Listings start right after the counts
+        at = 7 + LISTING_WORDS * self._listing_count
+        self.order_depths: Dict[Symbol, OrderDepthView] = {}
+        for _ in range(depths):
+            symbol, buys, sells = words[at:at + 3]
+            self.order_depths[strings[symbol]] = OrderDepthView(words, at + 3, buys, sells)
+            at += 3 + 2 * (buys + sells)
+        self._trades_at = at
+        self._pairs_at = at + TRADE_WORDS * (self._own + self._market)
+
+        self._listings = None
+        self._own_trades = None
+        self._market_trades = None
+        self._position = None
+        self._observation_values = None
+
+    def trades(self, start: int, count: int) -> Dict[Symbol, List[Trade]]:
+        strings = self._strings
+        trades: Dict[Symbol, List[Trade]] = {}
+        at = self._trades_at + TRADE_WORDS * start
+        for symbol, price, quantity, buyer, seller in zip(*[iter(self._words[at:at + TRADE_WORDS * count].tolist())] * TRADE_WORDS):
+            trades.setdefault(strings[symbol], []).append(Trade(strings[symbol], price, quantity, strings[buyer], strings[seller]))
+        return trades
+
+    def pairs(self, start: int, count: int) -> Dict[str, int]:
+        at = self._pairs_at + PAIR_WORDS * start
+        values = self._words[at:at + PAIR_WORDS * count].tolist()
+        return {self._strings[key]: value for key, value in zip(values[::2], values[1::2])}
+
+    @property
+    def listings(self) -> Dict[Symbol, Listing]:
+        if self._listings is None:
+            strings = self._strings
+            values = self._words[7:7 + LISTING_WORDS * self._listing_count].tolist()
+            self._listings = {}
+            for symbol, product, denomination in zip(*[iter(values)] * LISTING_WORDS):
+                self._listings[strings[symbol]] = Listing(strings[symbol], strings[product], strings[denomination])
+        return self._listings
+
+    @property
+    def own_trades(self) -> Dict[Symbol, List[Trade]]:
+        if self._own_trades is None:
+            self._own_trades = self.trades(0, self._own)
+        return self._own_trades
+
+    @property
+    def market_trades(self) -> Dict[Symbol, List[Trade]]:
+        if self._market_trades is None:
+            self._market_trades = self.trades(self._own, self._market)
+        return self._market_trades
+
+    @property
+    def position(self) -> Dict[str, int]:
+        if self._position is None:
+            self._position = self.pairs(0, self._positions)
+        return self._position
+
+    @property
+    def observations(self) -> Dict[str, int]:
+        if self._observation_values is None:
+            self._observation_values = self.pairs(self._positions, self._observations)
+        return self._observation_values
+
+    @property
+    def __dict__(self) -> Dict:
+        return {'timestamp': self.timestamp, 'listings': self.listings, 'order_depths': self.order_depths, 'own_trades': self.own_trades,
+                'market_trades': self.market_trades, 'position': self.position, 'observations': self.observations}
+
+    def toJSON(self):
+        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+
+
+def encode_orders(orders: Dict[str, List[Order]]) -> bytes:
+    """
+    Prices and quantities are sent as float64 with a word of flags telling which of them were floats, so that
+    a trader sending 20.0 or 1 / 30 * 600 gets exactly that to the exchange, which can reject it like the real one
+    """
+    strings = Strings()
+    words = array('d', [len(orders)])
+    for key, key_orders in orders.items():
+        words.extend((strings(key), len(key_orders)))
+        for order in key_orders:
+            flags = isinstance(order.price, float) | isinstance(order.quantity, float) << 1
+            words.extend((strings(order.symbol), order.price, order.quantity, flags))
+    return strings.pack(ORDERS, words)
+
+
+def decode_orders(buffer) -> Dict[str, List[Order]]:
+    """
+    The engine needs every order, so they are decoded into real Orders at once
+    """
+    strings, words = unpack(buffer, ORDERS, 'd')
+    values = words.tolist()
+    orders: Dict[str, List[Order]] = {}
+    at = 1
+    for _ in range(int(values[0])):
+        key, count = int(values[at]), int(values[at + 1])
+        at += 2
+        orders[strings[key]] = [Order(strings[int(symbol)], price if flags % 2 else int(price), quantity if flags >= 2 else int(quantity))
+                                for symbol, price, quantity, flags in zip(*[iter(values[at:at + ORDER_WORDS * count])] * ORDER_WORDS)]
+        at += ORDER_WORDS * count
+    return orders
+
+
+def same_state(a, b) -> bool:
+    """
+    Compares two states field by field, for checking a round trip
+    """
+    def trades(trades):
+        return {symbol: [(t.symbol, t.price, t.quantity, t.buyer or '', t.seller or '') for t in symbol_trades] for symbol, symbol_trades in trades.items()}
+
+    return (a.timestamp == b.timestamp
+            and {s: (l.symbol, l.product, l.denomination) for s, l in a.listings.items()} == {s: (l.symbol, l.product, l.denomination) for s, l in b.listings.items()}
+            and {s: (d.buy_orders, d.sell_orders) for s, d in a.order_depths.items()} == {s: (d.buy_orders, d.sell_orders) for s, d in b.order_depths.items()}
+            and trades(a.own_trades) == trades(b.own_trades)
+            and trades(a.market_trades) == trades(b.market_trades)
+            and a.position == b.position
+            and a.observations == b.observations)
+
+
+def benchmark(states: List[TradingState], orders: Dict[str, List[Order]]) -> List[Tuple[str, float, float, int]]:
+    """
+    Encodes and decodes every state with each format, then reads the best bid and ask of every product
+    like a trader would
+
+    Returns:
+    (format, encode states/s, decode and read states/s, mean bytes per state) per format
+    """
+    from log_parser import parse_state
+
+    def touch(state) -> None:
+        for order_depth in state.order_depths.values():
+            max(order_depth.buy_orders, default=None)
+            min(order_depth.sell_orders, default=None)
+
+    formats = [
+        ('wire', encode_state, StateView),
+        ('pickle', lambda state: pickle.dumps(state, pickle.HIGHEST_PROTOCOL), pickle.loads),
+        ('json', lambda state: state.toJSON().encode(), lambda data: parse_state(json.loads(data))),
+    ]
+
+    results = []
+    for name, encode, decode in formats:
+        start = time.perf_counter()
+        encoded = [encode(state) for state in states]
+        encoding = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for data in encoded:
+            touch(decode(data))
+        decoding = time.perf_counter() - start
+
+        results.append((name, len(states) / encoding, len(states) / decoding, sum(map(len, encoded)) // len(encoded)))
+
+    return results
+
+
+if __name__ == '__main__':
+    # python wire.py [round] [day]   throughput against pickle and JSON, the round trip is checked by test_wire.py
+    from fake_market import FakeMarket, day_files, read_prices, read_trades
+
+    round = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    day = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    prices, trades_file = day_files(round, day)
+    books, day_trades = read_prices(prices), read_trades(trades_file)
+
+    market = FakeMarket(None)
+    market.position = {'PEARLS': -7, 'BANANAS': 20}
+    states = [market.make_state(timestamp, books[timestamp], day_trades.get(timestamp, {})) for timestamp in sorted(books)]
+    orders = {
+        'PEARLS': [Order('PEARLS', 9998, 5), Order('PEARLS', 10002, -5)],
+        'COCONUTS': [Order('COCONUTS', 8000, 20), Order('COCONUTS', 7999, 10)],
+    }
+
+    print(f'{"format":<8} {"encode/s":>10} {"decode/s":>10} {"bytes":>7}')
+    for name, encoding, decoding, size in benchmark(states, orders):
+        print(f'{name:<8} {encoding:>10.0f} {decoding:>10.0f} {size:>7}')